@@ -0,0 +1,541 @@
+"""检查 ``hugo --minify`` 的构建结果 (``public/``)，超出体积预算时返回 1，供 CI 拦截页面体积回退。
+
+- 把每个页面的字节数分配给生成它的模板：head / baseof / header / footer，以及 index / list / single；
+  文章页里的正文 (.Content) 单独记为 content，不算模板开销
+- 找出重复的内联标记：同一页面里重复出现的内联 SVG（ICONS 里的图标应该走 sprite）、
+  反复出现的长 Tailwind class 字符串
+- 统计 main.css 中没有被任何页面用到的规则所占的字节
+
+::
+
+    hugo --minify && python brutal_audit.py
+    python brutal_audit.py --budget template.single=12k --budget css.unused=0.3
+
+预算默认值见 DEFAULT_BUDGETS，可以在站点根目录的 brutal-budgets.json 里覆盖，值为 null 表示不检查。
+"""
+import functools
+import glob
+import json
+import os
+import re
+import sys
+from collections import Counter
+
+import brutal_theme_installer as installer
+
+BUDGETS_NAME = "brutal-budgets.json"
+# template.*：单个页面上该模板产生的字节数；page.*：单个页面的 HTML 字节数；
+# duplicate：单个页面里重复的内联标记字节数；css.main：main.css 字节数；css.unused：main.css 未使用比例
+DEFAULT_BUDGETS = {
+    "template.head": 48 * 1024,
+    "template.baseof": 1024,
+    "template.header": 6 * 1024,
+    "template.footer": 6 * 1024,
+    "template.index": 48 * 1024,
+    "template.list": 48 * 1024,
+    "template.single": 8 * 1024,
+    "page.index": 96 * 1024,
+    "page.list": 96 * 1024,
+    "page.single": 256 * 1024,
+    "duplicate": 8 * 1024,
+    "css.main": 64 * 1024,
+    "css.unused": 0.4,
+}
+# 模板名 -> 主题里对应的文件
+TEMPLATE_FILES = {
+    "head": "layouts/partials/head.html",
+    "baseof": "layouts/_default/baseof.html",
+    "header": "layouts/partials/header.html",
+    "footer": "layouts/partials/footer.html",
+    "index": "layouts/index.html",
+    "list": "layouts/_default/list.html",
+    "single": "layouts/_default/single.html",
+}
+PAGE_KINDS = ("index", "list", "single")
+# 达到这个长度、并在同一页面出现 CLASS_REPEAT 次以上的 class 字符串算重复
+LONG_CLASS = 40
+CLASS_REPEAT = 3
+# 报告里列出的重复标记、未使用规则条数
+TOP = 10
+
+# Hugo 为 aliases、/page/1/ 生成的跳转页，不是真正的页面
+_REDIRECT_RE = re.compile(rb'<meta\b[^>]*http-equiv="?refresh', re.I)
+_PAGINATED_RE = re.compile(r"(^|/)page/\d+/index\.html$")
+_PROSE_RE = re.compile(rb'<div\b[^>]*\bclass="?[^">]*(?<![\w-])prose(?![\w-])', re.I)
+_INLINE_SVG_RE = re.compile(rb"<svg\b.*?</svg>", re.S | re.I)
+_CLASS_ATTR_RE = re.compile(rb'\bclass=(?:"([^"]*)"|([^\s>"\']+))')
+_STYLESHEET_RE = re.compile(rb'<link\b[^>]*\brel="?(?:stylesheet|preload)[^>]*>', re.I)
+_HREF_RE = re.compile(rb'\bhref="?([^" >]+)', re.I)
+
+
+# --- 按模板分配字节 ---
+
+@functools.lru_cache(maxsize=None)
+def _tag_re(tag):
+    return re.compile(rb"<(/?)" + tag + rb"(?=[\s>/])", re.I)
+
+
+def _element(html, tag, start=0, end=None):
+    """html[start:end] 中第一个 <tag> 元素（允许同名嵌套）的 (起, 止)，找不到时返回 None。"""
+    end = len(html) if end is None else end
+    depth = 0
+    first = None
+    for m in _tag_re(tag).finditer(html, start, end):
+        if first is None and m.group(1):
+            continue
+        if first is None:
+            first = m.start()
+        depth += -1 if m.group(1) else 1
+        if depth == 0:
+            return first, html.find(b">", m.end(), end) + 1
+    return (first, end) if first is not None else None
+
+
+def page_kind(public, path):
+    """按 Hugo 的默认输出判断页面类型：首页、列表页（带 RSS 或在 page/N/ 下）、文章页。"""
+    rel = os.path.relpath(path, public).replace(os.sep, "/")
+    if rel == "index.html":
+        return "index"
+    if os.path.exists(os.path.join(os.path.dirname(path), "index.xml")) or _PAGINATED_RE.search(rel):
+        return "list"
+    return "single"
+
+
+def attribute_page(html, kind):
+    """把一个页面的字节数分配给生成它的模板，返回 {名称: 字节数}，各项之和等于页面大小；
+    页面没有 <main>（不是 Brutal 主题生成的）时返回 None。
+
+    <head> 记给 head，<body> 里 <main> 之前的 <nav>/<header> 记给 header，
+    <footer> 及其后直到 </body> 的脚本记给 footer，<main> 里的内容记给页面模板，
+    其中 .prose 正文记为 content，剩下的 (doctype、html/body/main 标签等) 记给 baseof。
+    """
+    sizes = {"head": 0, "header": 0, kind: 0, "content": 0, "footer": 0}
+    head = _element(html, b"head")
+    if head:
+        sizes["head"] = head[1] - head[0]
+    body = max(html.find(b"<body"), head[1] if head else 0)
+    main = _element(html, b"main", body)
+    if not main:
+        return None
+    headers = [r for r in (_element(html, b"nav", body, main[0]), _element(html, b"header", body, main[0])) if r]
+    if headers:
+        start, end = min(headers)
+        sizes["header"] = end - start
+    inner = html.find(b">", main[0]) + 1
+    close = html.rfind(b"</main", inner, main[1])
+    close = main[1] if close == -1 else close
+    sizes[kind] = close - inner
+    prose = _PROSE_RE.search(html, inner, close)
+    if prose:
+        start, end = _element(html, b"div", prose.start(), close)
+        sizes["content"] = end - start
+        sizes[kind] -= sizes["content"]
+    else:
+        del sizes["content"]
+    footer = _element(html, b"footer", main[1])
+    if footer:
+        end = html.rfind(b"</body")
+        sizes["footer"] = (end if end > footer[1] else footer[1]) - footer[0]
+    sizes["baseof"] = len(html) - sum(sizes.values())
+    return sizes
+
+
+# --- 重复的内联标记 ---
+
+def _svg_key(markup):
+    inner = re.sub(rb"^<svg\b[^>]*>|</svg>$", b"", markup.strip())
+    return re.sub(rb"[\s\"'/]", b"", inner)
+
+
+@functools.lru_cache(maxsize=None)
+def _icon_names():
+    """{规范化后的图形内容: 图标名}，用于认出输出里内联的 ICONS 图标。"""
+    return {_svg_key(installer.split_icon(svg)[1].encode("utf-8")): name for name, svg in installer.ICONS.items()}
+
+
+def duplicates(html):
+    """页面里重复的内联标记，返回 [(类别, 说明, 次数, 多出的字节数)]。
+
+    引用 sprite 的 <svg><use></svg> 很短，不算重复。
+    """
+    found = []
+    svgs = Counter(m.group(0) for m in _INLINE_SVG_RE.finditer(html) if b"<use" not in m.group(0))
+    for svg, count in svgs.items():
+        if count > 1:
+            name = _icon_names().get(_svg_key(svg))
+            label = f"ICONS[{name!r}]" if name else svg[:60].decode("utf-8", "replace") + "..."
+            found.append(("svg", label, count, (count - 1) * len(svg)))
+    classes = Counter(m.group(0) for m in _CLASS_ATTR_RE.finditer(html) if len(m.group(0)) >= LONG_CLASS)
+    for attr, count in classes.items():
+        if count >= CLASS_REPEAT:
+            value = (_CLASS_ATTR_RE.match(attr).group(1) or b"").decode("utf-8", "replace")
+            found.append(("class", value, count, (count - 1) * len(attr)))
+    return found
+
+
+def _classes(html):
+    used = set()
+    for m in _CLASS_ATTR_RE.finditer(html):
+        used.update((m.group(1) or m.group(2)).decode("utf-8", "replace").split())
+    return used
+
+
+# --- main.css 覆盖率 ---
+
+# 条件规则展开到内部规则分别判断，其余 @ 规则 (@font-face、@keyframes、@property 等) 视为用到
+_CSS_GROUPING = ("@media", "@supports", "@layer", "@container", "@scope", "@starting-style")
+_CSS_MASK_RE = re.compile(r"/\*.*?\*/|\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'", re.S)
+_CSS_BRACE_RE = re.compile(r"[{}]")
+_CSS_CLASS_RE = re.compile(r"\.((?:\\[0-9a-fA-F]{1,6}\s?|\\[^\n]|[\w-]|[^\x00-\x7f])+)")
+_CSS_ESCAPE_RE = re.compile(r"\\([0-9a-fA-F]{1,6}\s?|.)", re.S)
+_CSS_ATTR_SELECTOR_RE = re.compile(r"(?<!\\)\[[^\]]*(?<!\\)\]")
+
+
+def _mask_css(css):
+    """注释和字符串换成等长的占位符，找括号时不会被其中的 { } ; 干扰。"""
+    return _CSS_MASK_RE.sub(lambda m: "_" * len(m.group(0)), css)
+
+
+def _css_rules(css, masked, start, end, out):
+    i = start
+    while i < end:
+        brace = masked.find("{", i, end)
+        semi = masked.find(";", i, end)
+        if brace == -1 or (semi != -1 and semi < brace):
+            if semi == -1:
+                break
+            if css[i:semi].strip():
+                out.append((None, len(css[i:semi + 1].encode("utf-8"))))
+            i = semi + 1
+            continue
+        depth = 0
+        close = end
+        for m in _CSS_BRACE_RE.finditer(masked, brace, end):
+            depth += 1 if m.group(0) == "{" else -1
+            if depth == 0:
+                close = m.start()
+                break
+        prelude = css[i:brace].strip()
+        if prelude.startswith("@"):
+            if prelude.split(None, 1)[0].lower() in _CSS_GROUPING:
+                _css_rules(css, masked, brace + 1, close, out)
+            else:
+                out.append((None, len(css[i:close + 1].encode("utf-8"))))
+        else:
+            out.append((prelude, len(css[i:close + 1].encode("utf-8"))))
+        i = close + 1
+
+
+def css_rules(css):
+    """把 CSS 拆成 [(选择器, 字节数)]；选择器为 None 的是不按 class 判断的 @ 规则。
+
+    嵌套的规则（Tailwind v4 输出里的 &）算在外层规则里。
+    """
+    out = []
+    _css_rules(css, _mask_css(css), 0, len(css), out)
+    return out
+
+
+def _strip_parens(selector, prefix):
+    """去掉 :not(...) 这类伪类，括号里的 class 不是规则生效的必要条件。"""
+    while True:
+        start = selector.find(prefix)
+        if start == -1:
+            return selector
+        depth = 0
+        for i in range(start + len(prefix) - 1, len(selector)):
+            depth += {"(": 1, ")": -1}.get(selector[i], 0)
+            if depth == 0:
+                break
+        selector = selector[:start] + selector[i + 1:]
+
+
+def _split_selectors(prelude):
+    parts, depth, last = [], 0, 0
+    for i, ch in enumerate(prelude):
+        if ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(prelude[last:i])
+            last = i + 1
+    parts.append(prelude[last:])
+    return parts
+
+
+def _unescape(name):
+    def repl(m):
+        text = m.group(1)
+        if re.fullmatch(r"[0-9a-fA-F]{1,6}\s?", text):
+            return chr(int(text.strip(), 16))
+        return text
+    return _CSS_ESCAPE_RE.sub(repl, name)
+
+
+def selector_used(prelude, used):
+    """选择器列表中只要有一个选择器需要的 class 都出现在页面上，规则就算用到。"""
+    for selector in _split_selectors(prelude):
+        selector = _CSS_ATTR_SELECTOR_RE.sub("", _strip_parens(selector, ":not("))
+        if all(_unescape(name) in used for name in _CSS_CLASS_RE.findall(selector)):
+            return True
+    return False
+
+
+def css_coverage(css, used):
+    """返回 {"bytes", "unused", "ratio", "top": [(选择器, 字节数)]}，ratio 为未使用字节占整个文件的比例。"""
+    total = len(css.encode("utf-8"))
+    unused = [(sel, size) for sel, size in css_rules(css) if sel is not None and not selector_used(sel, used)]
+    unused_bytes = sum(size for _, size in unused)
+    return {
+        "bytes": total,
+        "unused": unused_bytes,
+        "ratio": unused_bytes / total if total else 0,
+        "top": sorted(unused, key=lambda r: -r[1])[:TOP],
+    }
+
+
+def find_main_css(public, html):
+    """首页引用的 main*.css；找不到时退回 public/css/main*.css。"""
+    for tag in _STYLESHEET_RE.findall(html):
+        href = _HREF_RE.search(tag)
+        if not href:
+            continue
+        path = href.group(1).decode("utf-8").split("?", 1)[0].split("#", 1)[0]
+        if "://" in path or path.startswith("//"):
+            continue
+        name = os.path.basename(path)
+        full = os.path.join(public, path.lstrip("/"))
+        if name.startswith("main") and name.endswith(".css") and os.path.isfile(full):
+            return full
+    candidates = sorted(glob.glob(os.path.join(public, "css", "main*.css")))
+    return candidates[0] if candidates else None
+
+
+# --- 汇总 ---
+
+def audit(public):
+    """扫描 public 目录，返回报告 dict（可以直接 json.dumps）。"""
+    pages = []
+    for dirpath, _, filenames in os.walk(public):
+        pages += [os.path.join(dirpath, n) for n in filenames if n == "index.html"]
+    pages.sort()
+
+    templates = {}
+    kinds = {kind: {"pages": 0, "max": 0, "max_page": None} for kind in PAGE_KINDS}
+    repeated = {}
+    duplicate_max = {"bytes": 0, "page": None}
+    unattributed = []
+    used = set()
+    home = b""
+    for path in pages:
+        with open(path, "rb") as f:
+            html = f.read()
+        if _REDIRECT_RE.search(html):
+            continue
+        rel = os.path.relpath(path, public).replace(os.sep, "/")
+        kind = page_kind(public, path)
+        if kind == "index":
+            home = html
+        used |= _classes(html)
+        stat = kinds[kind]
+        stat["pages"] += 1
+        if stat["max_page"] is None or len(html) > stat["max"]:
+            stat.update(max=len(html), max_page=rel)
+        sizes = attribute_page(html, kind)
+        if sizes is None:
+            unattributed.append(rel)
+            sizes = {}
+        for name, size in sizes.items():
+            t = templates.setdefault(
+                name, {"file": TEMPLATE_FILES.get(name), "pages": 0, "total": 0, "max": 0, "max_page": None},
+            )
+            t["pages"] += 1
+            t["total"] += size
+            if t["max_page"] is None or size > t["max"]:
+                t.update(max=size, max_page=rel)
+        wasted = 0
+        for category, label, count, extra in duplicates(html):
+            wasted += extra
+            r = repeated.setdefault((category, label), {"pages": 0, "count": 0, "bytes": 0})
+            r["pages"] += 1
+            r["count"] += count
+            r["bytes"] += extra
+        if wasted > duplicate_max["bytes"]:
+            duplicate_max.update(bytes=wasted, page=rel)
+
+    for t in templates.values():
+        t["avg"] = round(t.pop("total") / t["pages"]) if t["pages"] else 0
+    css = None
+    css_path = find_main_css(public, home)
+    if css_path:
+        with open(css_path, "r", encoding="utf-8") as f:
+            css = css_coverage(f.read(), used)
+        css["path"] = os.path.relpath(css_path, public).replace(os.sep, "/")
+        css["top"] = [{"selector": sel, "bytes": size} for sel, size in css["top"]]
+    top = sorted(repeated.items(), key=lambda item: -item[1]["bytes"])[:TOP]
+    return {
+        "pages": kinds,
+        "templates": templates,
+        "unattributed": unattributed,
+        "duplicates": {
+            "max": duplicate_max,
+            "top": [{"kind": kind, "markup": label, **r} for (kind, label), r in top],
+        },
+        "css": css,
+    }
+
+
+def parse_budget(value):
+    """预算值：数字、带 k/KB/M/MB 后缀的字节数，或 None（不检查）。"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    text = str(value).strip().lower()
+    if text in ("", "none", "off", "null"):
+        return None
+    m = re.fullmatch(r"([\d.]+)\s*(k|kb|m|mb)?", text)
+    if not m:
+        raise ValueError(f"无法解析的预算值: {value}")
+    scale = {None: 1, "k": 1024, "kb": 1024, "m": 1024 * 1024, "mb": 1024 * 1024}[m.group(2)]
+    if m.group(2) or "." not in m.group(1):
+        return int(float(m.group(1)) * scale)
+    return float(m.group(1))
+
+
+def load_budgets(path=None, overrides=()):
+    """默认预算 <- 预算文件 <- 命令行 KEY=VALUE，未知的键会报错，避免拼错后静默失效。"""
+    budgets = dict(DEFAULT_BUDGETS)
+    updates = []
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            updates += list(json.load(f).items())
+    for item in overrides:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"预算需要写成 KEY=VALUE: {item}")
+        updates.append((key.strip(), value))
+    for key, value in updates:
+        if key not in DEFAULT_BUDGETS:
+            raise ValueError(f"未知的预算项: {key} (可用: {', '.join(DEFAULT_BUDGETS)})")
+        budgets[key] = parse_budget(value)
+    return budgets
+
+
+def check_budgets(report, budgets):
+    """返回超出预算的项 [(键, 实际值, 预算, 页面)]。"""
+    checks = []
+    for name, t in report["templates"].items():
+        checks.append((f"template.{name}", t["max"], t["max_page"]))
+    for kind, stat in report["pages"].items():
+        if stat["pages"]:
+            checks.append((f"page.{kind}", stat["max"], stat["max_page"]))
+    checks.append(("duplicate", report["duplicates"]["max"]["bytes"], report["duplicates"]["max"]["page"]))
+    if report["css"]:
+        checks.append(("css.main", report["css"]["bytes"], report["css"]["path"]))
+        checks.append(("css.unused", round(report["css"]["ratio"], 4), report["css"]["path"]))
+    return [
+        (key, value, budgets[key], page) for key, value, page in checks
+        if budgets.get(key) is not None and value > budgets[key]
+    ]
+
+
+def _kb(n):
+    return f"{n / 1024:.1f} KB"
+
+
+def print_report(report, budgets, out=sys.stdout):
+    counts = ", ".join(f"{kind} {stat['pages']}" for kind, stat in report["pages"].items())
+    print(f"📦 {sum(s['pages'] for s in report['pages'].values())} pages ({counts})", file=out)
+    print(f"   {'template':<10}{'pages':>7}{'avg':>12}{'max':>12}{'budget':>12}  max page", file=out)
+    order = ["head", "baseof", "header", "footer", *PAGE_KINDS, "content"]
+    for name in sorted(report["templates"], key=lambda n: order.index(n) if n in order else len(order)):
+        t = report["templates"][name]
+        budget = budgets.get(f"template.{name}")
+        print(
+            f"   {name:<10}{t['pages']:>7}{_kb(t['avg']):>12}{_kb(t['max']):>12}"
+            f"{_kb(budget) if budget is not None else '-':>12}  {t['max_page'] or ''}",
+            file=out,
+        )
+    if report["unattributed"]:
+        print(
+            f"⚠️  {len(report['unattributed'])} pages 没有 <main>，不是 Brutal 主题生成的，"
+            f"未计入模板统计 (例如 {report['unattributed'][0]})",
+            file=out,
+        )
+    dup = report["duplicates"]
+    if dup["top"]:
+        print(f"🔁 重复的内联标记 (单页最多 {_kb(dup['max']['bytes'])}: {dup['max']['page']})", file=out)
+        for item in dup["top"]:
+            markup = item["markup"] if len(item["markup"]) <= 80 else item["markup"][:77] + "..."
+            print(f"   {item['kind']:<6}{_kb(item['bytes']):>10} on {item['pages']} pages  {markup}", file=out)
+    css = report["css"]
+    if css:
+        print(
+            f"🎨 {css['path']}: {_kb(css['bytes'])}, unused {_kb(css['unused'])} ({css['ratio']:.0%})",
+            file=out,
+        )
+        for rule in css["top"]:
+            print(f"   {rule['bytes']:>6} B  {rule['selector'][:100]}", file=out)
+    else:
+        print("🎨 没有找到 main.css，跳过覆盖率统计", file=out)
+
+
+# --- 命令行入口 ---
+
+def build_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="检查 Brutal 主题构建结果的页面体积预算")
+    parser.add_argument("--site", default=".", help="Hugo 站点根目录 (默认当前目录)")
+    parser.add_argument("--public", help="构建输出目录 (默认 <site>/public)")
+    parser.add_argument("--budgets", help=f"预算 JSON 文件 (默认 <site>/{BUDGETS_NAME}，存在时读取)")
+    parser.add_argument(
+        "--budget", action="append", default=[], metavar="KEY=VALUE",
+        help="覆盖单项预算，例如 template.single=8k、css.unused=0.3、duplicate=none",
+    )
+    parser.add_argument("-o", "--output", help="把完整报告写成 JSON")
+    parser.add_argument("-q", "--quiet", action="store_true", help="只输出超出预算的项")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    public = args.public or os.path.join(args.site, "public")
+    if not os.path.isdir(public):
+        print(f"❌ 找不到 {public}，请先运行 hugo --minify", file=sys.stderr)
+        return 2
+    budgets_path = args.budgets
+    if budgets_path is None and os.path.exists(os.path.join(args.site, BUDGETS_NAME)):
+        budgets_path = os.path.join(args.site, BUDGETS_NAME)
+    try:
+        budgets = load_budgets(budgets_path, args.budget)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    report = audit(public)
+    if not report["templates"]:
+        # 没有一个页面能归到 Brutal 模板：站点用的是别的主题，默认预算对它没有意义，不阻止发布
+        print(
+            f"⚠️  {public} 中没有 Brutal 主题生成的页面 (没有 <main>)，跳过预算检查",
+            file=sys.stderr,
+        )
+        return 0
+    if not args.quiet:
+        print_report(report, budgets)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"budgets": budgets, **report}, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+    failures = check_budgets(report, budgets)
+    for key, value, budget, page in failures:
+        shown = f"{value:.0%} > {budget:.0%}" if key == "css.unused" else f"{_kb(value)} > {_kb(budget)}"
+        print(f"❌ {key}: {shown} ({page})", file=sys.stderr)
+    if not failures and not args.quiet:
+        print("✅ 所有页面都在预算之内")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,413 @@
+"""Brutal 主题的规模基准测试。
+
+生成 100 / 1k / 10k 篇文章的合成 Hugo 站点（中英混排正文、代码块、标签、图片），
+用 brutal_theme_installer 生成主题后执行 ``hugo --minify``，记录：
+
+- 构建耗时 (wall time) 和 hugo 进程的峰值 RSS
+- ``--templateMetrics --templateMetricsHints`` 输出的模板耗时
+- 各类页面 (index / list / single) 的 HTML、CSS、JS 字节数
+
+结果写成 JSON，可以用 ``--compare`` 和上一次的结果对比，离线发现性能回退::
+
+    python brutal_bench.py --sizes 100,1000 -o bench.json
+    python brutal_bench.py --sizes 100,1000 --compare bench.json
+"""
+import dataclasses
+import json
+import os
+import random
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+import brutal_theme_installer as installer
+
+DEFAULT_SIZES = (100, 1000, 10000)
+# 每类页面最多统计多少个样本，10k 篇文章时不必逐页解析
+PAGE_SAMPLES = 50
+
+_EN_WORDS = (
+    "hugo template render cache partial layout request latency server client build index "
+    "token stream buffer memory thread worker queue deploy static asset image font script"
+).split()
+_ZH_PHRASES = (
+    "性能优化", "模板渲染", "静态站点", "增量构建", "缓存策略", "并发处理", "内存占用",
+    "本土化", "国际化", "依赖注入", "设计模式", "部署流程", "自动化", "大语言模型", "搜索索引",
+)
+_TAGS = ("Go", "Hugo", "AI", "MCP", "Docker", "i18n", "性能", "前端", "后端", "教程", "自动化", "数据库")
+_CODE = {
+    "go": 'package main\n\nimport "fmt"\n\nfunc main() {\n\tfor i := 0; i < %d; i++ {\n\t\tfmt.Println("hello", i)\n\t}\n}\n',
+    "bash": "#!/usr/bin/env bash\nset -euo pipefail\nfor i in $(seq 1 %d); do\n  echo \"build $i\"\ndone\n",
+    "python": "def main():\n    total = 0\n    for i in range(%d):\n        total += i\n    return total\n",
+}
+
+
+# --- 合成站点 ---
+
+def png_bytes(width, height, seed):
+    """生成一张渐变 PNG（纯标准库），用来触发 Hugo 的图片处理。"""
+    r0, g0, b0 = (seed * 37) % 256, (seed * 91) % 256, (seed * 53) % 256
+    rows = []
+    for y in range(height):
+        row = bytearray([0])
+        shade = y * 255 // max(height - 1, 1)
+        for x in range(width):
+            row += bytes(((r0 + x) % 256, (g0 + shade) % 256, b0))
+        rows.append(bytes(row))
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(b"".join(rows), 6)) + chunk(b"IEND", b"")
+    )
+
+
+def _paragraph(rng):
+    parts = []
+    for _ in range(rng.randint(4, 9)):
+        if rng.random() < 0.6:
+            parts.append(rng.choice(_ZH_PHRASES) + "，" + "".join(rng.sample(_ZH_PHRASES, 2)) + "。")
+        else:
+            parts.append(" ".join(rng.choice(_EN_WORDS) for _ in range(rng.randint(5, 12))).capitalize() + ". ")
+    return "".join(parts)
+
+
+def post_markdown(index, rng, image=None):
+    tags = rng.sample(_TAGS, rng.randint(1, 4))
+    day = 1 + index % 28
+    month = 1 + (index // 28) % 12
+    lines = [
+        "---",
+        f'title: "{rng.choice(_ZH_PHRASES)}实践 {index}: {" ".join(rng.sample(_EN_WORDS, 3))}"',
+        f"date: 2025-{month:02d}-{day:02d}T10:00:00+08:00",
+        "draft: false",
+        "tags: [" + ", ".join(f'"{t}"' for t in tags) + "]",
+        f'categories: ["{rng.choice(("技术", "编程", "Tutorial"))}"]',
+        "---",
+        "",
+        _paragraph(rng),
+        "",
+    ]
+    if image:
+        lines += [f"![{rng.choice(_ZH_PHRASES)}]({image})", ""]
+    for section in range(rng.randint(2, 5)):
+        lines += [f"## {rng.choice(_ZH_PHRASES)} {section + 1}", "", _paragraph(rng), ""]
+        if rng.random() < 0.7:
+            lang = rng.choice(sorted(_CODE))
+            lines += [f"```{lang}", _CODE[lang] % rng.randint(3, 99), "```", ""]
+        lines += [_paragraph(rng), ""]
+    return "\n".join(lines)
+
+
+SITE_CONFIG = """baseURL = 'https://example.org/'
+languageCode = 'zh-CN'
+title = "Brutal Bench"
+theme = '{theme}'
+
+[pagination]
+  pagerSize = 10
+
+[menu]
+  [[menu.main]]
+    weight = 1
+    name = "文章"
+    url = "/posts/"
+  [[menu.main]]
+    weight = 2
+    name = "标签"
+    url = "/tags/"
+
+[params]
+  description = "synthetic benchmark site"
+  github = "https://github.com/example"
+  twitter = "https://twitter.com/example"
+  tools = ["Go", "Hugo", "Tailwind"]
+"""
+
+
+def generate_site(root, posts, config, seed=0, image_every=10, node_root="."):
+    """在 root 下生成一个包含 posts 篇文章的 Hugo 站点，并写入主题。"""
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root, "content", "posts"), exist_ok=True)
+    with open(os.path.join(root, "hugo.toml"), "w", encoding="utf-8") as f:
+        f.write(SITE_CONFIG.format(theme=config.name))
+    with open(os.path.join(root, "content", "_index.md"), "w", encoding="utf-8") as f:
+        f.write("---\ntitle: Home\n---\n合成基准站点 synthetic benchmark site.\n")
+
+    image = None
+    for i in range(posts):
+        if image_every and i % image_every == 0:
+            # 带图片的文章用 page bundle，图片才能被 render-image.html 处理
+            bundle = os.path.join(root, "content", "posts", f"post-{i:05d}")
+            os.makedirs(bundle, exist_ok=True)
+            if image is None:
+                image = png_bytes(1600, 900, seed)
+            with open(os.path.join(bundle, "cover.png"), "wb") as f:
+                f.write(image)
+            path, cover = os.path.join(bundle, "index.md"), "cover.png"
+        else:
+            path, cover = os.path.join(root, "content", "posts", f"post-{i:05d}.md"), None
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(post_markdown(i, rng, cover))
+
+    # PostCSS 需要站点自己的 node_modules，复制当前仓库的。
+    # 不能用软链接：Hugo 以 node --permission 运行 PostCSS，只允许读取站点目录内的文件
+    for name in ("package.json", "postcss.config.js"):
+        src = os.path.join(node_root, name)
+        if os.path.exists(src):
+            shutil.copy(src, os.path.join(root, name))
+    modules = os.path.join(node_root, "node_modules")
+    if os.path.isdir(modules):
+        shutil.copytree(modules, os.path.join(root, "node_modules"), symlinks=True)
+
+    config = dataclasses.replace(config, site=root, cache_dir=None)
+    started = time.perf_counter()
+    files = installer.render_theme(config)
+    render_s = time.perf_counter() - started
+    installer.emit(files, installer.DirectorySink(os.path.join(root, "themes", config.name)))
+    return render_s
+
+
+# --- 构建与测量 ---
+
+_DURATION = r"[\d.]+\s?(?:ns|µs|us|ms|s|m|h)"
+_DURATION_RE = re.compile(r"([\d.]+)\s?(ns|µs|us|ms|s|m|h)")
+_DURATION_UNITS = {"ns": 1e-9, "µs": 1e-6, "us": 1e-6, "ms": 1e-3, "s": 1.0, "m": 60.0, "h": 3600.0}
+# 有 --templateMetricsHints 时多出 cache potential / percent cached / cached count 三列
+_METRICS_ROW_RE = re.compile(
+    rf"^\s*({_DURATION})\s+({_DURATION})\s+({_DURATION})\s+(?:(\d+)\s+(\d+)\s+(\d+)\s+)?(\d+)\s+(\S+)\s*$"
+)
+
+
+def parse_duration(text):
+    """Go 的 time.Duration 字符串 ('1m2.5s', '350.2 µs') -> 秒。"""
+    return sum(float(n) * _DURATION_UNITS[u] for n, u in _DURATION_RE.findall(text))
+
+
+def parse_template_metrics(output):
+    """解析 hugo --templateMetrics(--templateMetricsHints) 的表格。"""
+    rows = []
+    for line in output.splitlines():
+        m = _METRICS_ROW_RE.match(line)
+        if not m:
+            continue
+        cumulative, average, maximum, potential, percent, cached, count, template = m.groups()
+        rows.append({
+            "template": template,
+            "cumulative_s": parse_duration(cumulative),
+            "average_s": parse_duration(average),
+            "maximum_s": parse_duration(maximum),
+            "count": int(count),
+            "cache_potential": int(potential) if potential is not None else None,
+            "cached_count": int(cached) if cached is not None else None,
+        })
+    return rows
+
+
+def run_hugo(site, hugo="hugo"):
+    """执行一次完整构建，返回 (耗时, 峰值 RSS KB, 输出)。用 wait4 拿到这个子进程自己的 rusage。"""
+    cmd = [hugo, "--minify", "--templateMetrics", "--templateMetricsHints", "-s", site, "-d", "public"]
+    with tempfile.TemporaryFile() as out:
+        started = time.perf_counter()
+        proc = subprocess.Popen(cmd, stdout=out, stderr=subprocess.STDOUT)
+        _, status, usage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - started
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        out.seek(0)
+        output = out.read().decode("utf-8", errors="replace")
+    if proc.returncode != 0:
+        raise RuntimeError(f"hugo 构建失败 ({proc.returncode}):\n{output[-4000:]}")
+    # Linux 上 ru_maxrss 的单位是 KB，macOS 上是字节
+    rss = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return wall, rss, output
+
+
+_LINK_RE = re.compile(r'<link\b[^>]*\brel="?stylesheet"?[^>]*>', re.I)
+_SCRIPT_SRC_RE = re.compile(r'<script\b[^>]*\bsrc="?([^" >]+)', re.I)
+# Hugo 为 /page/1/ 等生成的跳转页，不是真正的页面
+_REDIRECT_RE = re.compile(r'<meta\b[^>]*http-equiv="?refresh', re.I)
+_HREF_RE = re.compile(r'\bhref="?([^" >]+)', re.I)
+_INLINE_RE = {
+    "css": re.compile(r"<style\b[^>]*>(.*?)</style>", re.S | re.I),
+    "js": re.compile(r"<script\b(?![^>]*\bsrc=)[^>]*>(.*?)</script>", re.S | re.I),
+}
+
+
+def _asset_size(public, url, cache):
+    path = url.split("#", 1)[0].split("?", 1)[0]
+    if "://" in path or path.startswith("//"):
+        return 0
+    if path not in cache:
+        full = os.path.join(public, path.lstrip("/"))
+        cache[path] = os.path.getsize(full) if os.path.isfile(full) else 0
+    return cache[path]
+
+
+def page_weight(public, html_path, cache):
+    """统计一个页面的 HTML 字节数，以及它引用/内联的 CSS、JS 字节数；跳转页返回 None。"""
+    with open(html_path, "rb") as f:
+        html = f.read()
+    text = html.decode("utf-8", errors="replace")
+    if _REDIRECT_RE.search(text):
+        return None
+    css = sum(len(m.encode("utf-8")) for m in _INLINE_RE["css"].findall(text))
+    js = sum(len(m.encode("utf-8")) for m in _INLINE_RE["js"].findall(text))
+    # <noscript> 里的回退 link 与外层指向同一文件，按 URL 去重
+    css += sum(_asset_size(public, u, cache) for u in {
+        _HREF_RE.search(tag).group(1) for tag in _LINK_RE.findall(text) if _HREF_RE.search(tag)
+    })
+    js += sum(_asset_size(public, u, cache) for u in set(_SCRIPT_SRC_RE.findall(text)))
+    return {"html": len(html), "css": css, "js": js}
+
+
+def classify_pages(public):
+    """按页面类型列出 public 下的 HTML 文件。"""
+    pages = {"index": [], "list": [], "single": []}
+    index = os.path.join(public, "index.html")
+    if os.path.exists(index):
+        pages["index"].append(index)
+    posts = os.path.join(public, "posts")
+    for dirpath, _, filenames in os.walk(posts):
+        if "index.html" not in filenames:
+            continue
+        rel = os.path.relpath(dirpath, posts).replace(os.sep, "/")
+        kind = "list" if rel == "." or rel.startswith("page/") else "single"
+        pages[kind].append(os.path.join(dirpath, "index.html"))
+    return {kind: sorted(paths) for kind, paths in pages.items()}
+
+
+def summarize_weights(public, samples=PAGE_SAMPLES):
+    cache = {}
+    result = {}
+    for kind, paths in classify_pages(public).items():
+        if not paths:
+            continue
+        step = max(1, len(paths) // samples)
+        weights = [page_weight(public, p, cache) for p in paths[::step][:samples]]
+        weights = [w for w in weights if w is not None]
+        if not weights:
+            continue
+        result[kind] = {"pages": len(paths), "sampled": len(weights)}
+        for key in ("html", "css", "js"):
+            values = [w[key] for w in weights]
+            result[kind][key] = {"avg": round(sum(values) / len(values)), "max": max(values)}
+    return result
+
+
+def bench_size(posts, workdir, config, hugo="hugo", seed=0, image_every=10, keep=False):
+    site = os.path.join(workdir, f"site-{posts}")
+    if os.path.exists(site):
+        shutil.rmtree(site)
+    started = time.perf_counter()
+    render_s = generate_site(site, posts, config, seed=seed, image_every=image_every)
+    generate_s = time.perf_counter() - started
+    try:
+        wall, rss, output = run_hugo(site, hugo)
+        return {
+            "posts": posts,
+            "generate_s": round(generate_s, 3),
+            "render_theme_s": round(render_s, 4),
+            "build_s": round(wall, 3),
+            "peak_rss_kb": rss,
+            "templates": parse_template_metrics(output),
+            "pages": summarize_weights(os.path.join(site, "public")),
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(site, ignore_errors=True)
+
+
+# --- 对比 ---
+
+def compare(current, baseline, tolerance):
+    """对比两份结果，返回超出 tolerance（相对增幅）的回退项列表。"""
+    regressions = []
+    previous = {run["posts"]: run for run in baseline.get("runs", [])}
+
+    def check(label, new, old):
+        if old and new is not None and (new - old) / old > tolerance:
+            regressions.append(f"{label}: {old} -> {new} (+{(new - old) / old:.0%})")
+
+    for run in current["runs"]:
+        old = previous.get(run["posts"])
+        if not old:
+            continue
+        n = run["posts"]
+        check(f"[{n}] build_s", run["build_s"], old["build_s"])
+        check(f"[{n}] peak_rss_kb", run["peak_rss_kb"], old["peak_rss_kb"])
+        for kind, weights in run["pages"].items():
+            for key in ("html", "css", "js"):
+                old_w = old["pages"].get(kind, {}).get(key)
+                if old_w:
+                    check(f"[{n}] {kind}.{key}.avg", weights[key]["avg"], old_w["avg"])
+    return regressions
+
+
+def build_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Brutal 主题规模基准测试")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="文章数，逗号分隔")
+    parser.add_argument("-o", "--output", help="结果 JSON 路径 (默认输出到标准输出)")
+    parser.add_argument("--compare", metavar="BASELINE", help="与之前的结果 JSON 对比，出现回退时返回 1")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="允许的相对增幅 (默认 0.10)")
+    parser.add_argument("--workdir", help="合成站点所在目录 (默认临时目录)")
+    parser.add_argument("--keep", action="store_true", help="保留生成的站点和 public 目录")
+    parser.add_argument("--hugo", default="hugo", help="hugo 可执行文件")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--image-every", type=int, default=10, help="每 N 篇文章带一张图片，0 表示不带图")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not shutil.which(args.hugo):
+        print(f"❌ 找不到 {args.hugo}，请先安装 Hugo extended", file=sys.stderr)
+        return 2
+    sizes = [int(n) for n in args.sizes.split(",") if n]
+    workdir = args.workdir or tempfile.mkdtemp(prefix="brutal-bench-")
+    version = subprocess.run([args.hugo, "version"], capture_output=True, text=True).stdout.strip()
+    config = installer.ThemeConfig()
+
+    runs = []
+    for n in sizes:
+        print(f"⏱️  {n} posts ...", file=sys.stderr)
+        run = bench_size(n, workdir, config, args.hugo, args.seed, args.image_every, args.keep)
+        print(f"   build {run['build_s']}s, peak RSS {run['peak_rss_kb']} KB", file=sys.stderr)
+        runs.append(run)
+    if not args.workdir and not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "hugo": version,
+        "theme": config.name,
+        "runs": runs,
+    }
+    data = json.dumps(result, indent=2, ensure_ascii=False) + "\n"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(data)
+    else:
+        sys.stdout.write(data)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"📈 {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+"""预先计算每篇文章的相关文章，写入 ``data/related.json``。
+
+所有文章向量化为 TF-IDF（分词与站内搜索相同：英文单词 + CJK 二元组），
+再拼上标签向量，一次批量矩阵乘法算出余弦相似度，取每篇文章的 top-k::
+
+    python brutal_related.py            # 在 Hugo 站点根目录运行
+
+主题的 single.html 直接按 ``.File.Path`` 查表，不需要 Hugo 在每个页面上计算 ``.Related``。
+
+每篇文章的词频按内容哈希缓存在 ``.brutal-cache/related.json``，
+只有内容变化的文章才会重新解析、分词。需要 NumPy: ``pip install numpy``。
+"""
+import glob
+import hashlib
+import json
+import math
+import os
+import sys
+import tempfile
+
+import brutal_search as search
+import brutal_theme_installer as installer
+
+RELATED_PATH = "data/related.json"
+CACHE_NAME = "related.json"
+TOP_K = 3
+# 相似度里标签重合所占的比重，其余为正文 TF-IDF
+TAG_WEIGHT = 0.3
+# 只保留文档频率最高的若干词项作为特征（出现在过半文章中的词视为停用词）
+MAX_FEATURES = 4096
+# 低于这个相似度的不算相关
+MIN_SCORE = 0.05
+# 每批计算多少行相似度，限制 N×N 矩阵的内存
+BATCH_ROWS = 1024
+
+
+def _require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise SystemExit("❌ 计算相关文章需要 NumPy: pip install numpy")
+    return numpy
+
+
+def post_key(site, path):
+    """文章在 related.json 中的键：相对 content 目录的路径，与 Hugo 的 .File.Path 一致。"""
+    return os.path.relpath(path, os.path.join(site, "content")).replace(os.sep, "/")
+
+
+def vectorize_post(path):
+    """解析一篇文章，返回 {"draft", "tags", "counts"}，放在模块顶层供进程池调用。"""
+    with open(path, "r", encoding="utf-8") as f:
+        meta, body = search.parse_front_matter(f.read())
+    tags = meta.get("tags") or []
+    tags = [str(t).lower() for t in (tags if isinstance(tags, list) else [tags])]
+    counts = {}
+    # 标题算三次，和正文一起参与 TF-IDF
+    text = " ".join([str(meta.get("title") or "")] * 3 + [str(meta.get("description") or ""), search.markdown_text(body)])
+    for term in search.tokenize(text):
+        counts[term] = counts.get(term, 0) + 1
+    return {"draft": meta.get("draft") is True, "tags": sorted(set(tags)), "counts": counts}
+
+
+def _file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_posts(site, cache_path=None, workers=None):
+    """读取所有文章的词频，只重新解析内容哈希变化的文章。
+
+    返回 ({key: 条目}, 重新解析的篇数)，草稿已排除。
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    cached = {}
+    if cache_path:
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == 1:
+                cached = data["posts"]
+        except (OSError, ValueError, KeyError):
+            cached = {}
+
+    paths = sorted({p for pattern in search.POST_GLOBS for p in glob.glob(os.path.join(site, pattern))})
+    entries = {}
+    stale = []
+    for path in paths:
+        key = post_key(site, path)
+        digest = _file_hash(path)
+        entry = cached.get(key)
+        if entry and entry.get("sha256") == digest:
+            entries[key] = entry
+        else:
+            stale.append((key, path, digest))
+
+    if len(stale) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fresh = list(pool.map(vectorize_post, [p for _, p, _ in stale], chunksize=16))
+    else:
+        fresh = [vectorize_post(p) for _, p, _ in stale]
+    for (key, _, digest), entry in zip(stale, fresh):
+        entry["sha256"] = digest
+        entries[key] = entry
+
+    if cache_path and (stale or set(cached) != set(entries)):
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        _write_atomic(cache_path, json.dumps({"version": 1, "posts": entries}, ensure_ascii=False, sort_keys=True))
+    return {key: e for key, e in entries.items() if not e["draft"]}, len(stale)
+
+
+def related_posts(posts, top_k=TOP_K, tag_weight=TAG_WEIGHT, max_features=MAX_FEATURES, min_score=MIN_SCORE):
+    """posts 为 {key: 条目}，返回 {key: [相关文章 key, ...]}。"""
+    np = _require_numpy()
+    keys = sorted(posts)
+    n = len(keys)
+    if n < 2:
+        return {key: [] for key in keys}
+
+    # 词项 -> 文档频率；只出现在一篇文章里的词对相似度没有贡献
+    df = {}
+    for key in keys:
+        for term in posts[key]["counts"]:
+            df[term] = df.get(term, 0) + 1
+    limit = max(2, n // 2) if n > 3 else n
+    features = [t for t, c in df.items() if 2 <= c <= limit]
+    features.sort(key=lambda t: (-df[t], t))
+    features = features[:max_features]
+    column = {t: i for i, t in enumerate(features)}
+    tags = sorted({t for key in keys for t in posts[key]["tags"]})
+    tag_column = {t: i for i, t in enumerate(tags)}
+
+    tf = np.zeros((n, len(features)), dtype=np.float32)
+    tag_matrix = np.zeros((n, len(tags)), dtype=np.float32)
+    for row, key in enumerate(keys):
+        for term, count in posts[key]["counts"].items():
+            col = column.get(term)
+            if col is not None:
+                tf[row, col] = 1 + math.log(count)
+        for tag in posts[key]["tags"]:
+            tag_matrix[row, tag_column[tag]] = 1
+
+    idf = np.log((1 + n) / (1 + np.array([df[t] for t in features], dtype=np.float32))) + 1
+
+    def normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    # 拼接后做一次点积即为 (1 - w)·正文余弦 + w·标签余弦
+    vectors = np.hstack([
+        normalize(tf * idf) * math.sqrt(1 - tag_weight),
+        normalize(tag_matrix) * math.sqrt(tag_weight),
+    ])
+
+    k = min(top_k, n - 1)
+    result = {}
+    for start in range(0, n, BATCH_ROWS):
+        block = vectors[start:start + BATCH_ROWS] @ vectors.T
+        rows = np.arange(block.shape[0])
+        block[rows, rows + start] = -1  # 排除自己
+        top = np.argpartition(-block, k - 1, axis=1)[:, :k]
+        for row, candidates in enumerate(top):
+            scores = block[row, candidates]
+            # 相似度降序，相同时按 key 保证结果稳定
+            order = sorted(range(k), key=lambda i: (-scores[i], keys[candidates[i]]))
+            result[keys[start + row]] = [keys[candidates[i]] for i in order if scores[i] >= min_score]
+    return result
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix="~", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_related(path, related):
+    """内容没有变化时不写文件，避免 hugo server 无谓地重建。返回是否写入。"""
+    text = json.dumps(related, ensure_ascii=False, indent=1, sort_keys=True) + "\n"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == text:
+                return False
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write_atomic(path, text)
+    return True
+
+
+# --- 命令行入口 ---
+
+def build_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="为 Brutal 主题预先计算相关文章")
+    parser.add_argument("--site", default=".", help="Hugo 站点根目录 (默认当前目录)")
+    parser.add_argument("-o", "--output", help=f"输出文件 (默认 <site>/{RELATED_PATH})")
+    parser.add_argument("-k", "--top-k", type=int, default=TOP_K, help=f"每篇文章的相关文章数 (默认 {TOP_K})")
+    parser.add_argument("--tag-weight", type=float, default=TAG_WEIGHT, help=f"标签重合的比重 0~1 (默认 {TAG_WEIGHT})")
+    parser.add_argument("--max-features", type=int, default=MAX_FEATURES, help="TF-IDF 特征数上限")
+    parser.add_argument("--no-cache", action="store_true", help="忽略缓存，重新解析所有文章")
+    parser.add_argument("--workers", type=int, help="解析文章的进程数 (默认 CPU 数)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不输出统计信息")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(os.path.join(args.site, "content")):
+        print(f"❌ {args.site} 下没有 content 目录，请在 Hugo 站点根目录运行", file=sys.stderr)
+        return 2
+    if args.top_k < 1:
+        print("❌ --top-k 至少为 1", file=sys.stderr)
+        return 2
+    if not 0 <= args.tag_weight <= 1:
+        print("❌ --tag-weight 需要在 0 到 1 之间", file=sys.stderr)
+        return 2
+    _require_numpy()
+    cache_path = None if args.no_cache else os.path.join(args.site, installer.CACHE_DIR_NAME, CACHE_NAME)
+    posts, parsed = load_posts(args.site, cache_path, args.workers)
+    related = related_posts(posts, args.top_k, args.tag_weight, args.max_features)
+    output = args.output or os.path.join(args.site, *RELATED_PATH.split("/"))
+    written = write_related(output, related)
+    if not args.quiet:
+        print(f"🔗 {len(posts)} posts, re-vectorized {parsed} -> {output}{'' if written else ' (unchanged)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+"""为 Brutal 主题预先生成站内搜索索引。
+
+解析 ``content/posts`` 下每篇文章的 front matter 和正文（多进程并行），
+按 CJK 二元组 + 英文单词分词，生成倒排索引并按词项前缀分片写入 ``static/search/``::
+
+    python brutal_search.py            # 在 Hugo 站点根目录运行
+    python brutal_search.py --site path/to/site
+
+输出：
+
+- ``meta.json``：文章数、分片数、分片文件名（每次都重新验证缓存）
+- ``s-<分片>.<哈希>.json``：``{词项: [文章 id 增量, 权重, ...]}``
+- ``d-<块>.<哈希>.json``：``[[url, 标题, 日期, 摘要], ...]``，按 id 每块 DOC_CHUNK 篇
+
+分片和摘要块的文件名带内容哈希，可以长期缓存；浏览器只下载查询需要的几个文件，
+不需要在客户端构建索引。分词和分片规则与主题里的 search.js 一致。
+"""
+import glob
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import tempfile
+import unicodedata
+from dataclasses import dataclass, field
+
+import brutal_theme_installer as installer
+
+POST_GLOBS = ("content/posts/*.md", "content/posts/*/index.md")
+# 每个摘要块的文章数
+DOC_CHUNK = 64
+# 单个分片的目标大小（字节），分片数按它自动取 2 的幂，文章越多分片越多，单个分片大小不变
+SHARD_TARGET = 16 * 1024
+MAX_BUCKETS = 4096
+SUMMARY_LENGTH = 120
+# 词项出现在不同位置的权重
+WEIGHTS = {"title": 10, "tags": 5, "description": 3, "body": 1}
+
+_WORD_RE = re.compile(rf"[a-z0-9]+|[{installer.SEARCH_CJK_CLASS}]+")
+_SHARD_FILE_RE = re.compile(r"^[sd]-\w+\.[0-9a-f]+\.json$")
+
+
+# --- 分词 ---
+
+def tokenize(text):
+    """NFKC + 小写后切词：ASCII 字母数字按词，CJK 连续片段切成二元组，单个 CJK 字保留单字。"""
+    terms = []
+    for run in _WORD_RE.findall(unicodedata.normalize("NFKC", text).lower()):
+        if run.isascii() or len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def shard_of(term, buckets):
+    """词项所在的分片：hash(前缀) % buckets。ASCII 词前缀取 2 个字符，CJK 取 1 个。"""
+    prefix = term[:2] if term.isascii() else term[:1]
+    h = 0
+    for ch in prefix:
+        # 与 JS 的 charCodeAt 一致：CJK_CLASS 只含 BMP 字符
+        h = (h * 31 + ord(ch)) & 0xFFFFFFFF
+    return h % buckets
+
+
+# --- 解析文章 ---
+
+def _scalar(value):
+    value = value.strip()
+    if not value:
+        return ""
+    if value[0] in "[\"":
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    if value[0] == "[" and value.endswith("]"):
+        return [_scalar(v) for v in value[1:-1].split(",") if v.strip()]
+    if len(value) > 1 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    if value in ("true", "false"):
+        return value == "true"
+    return value
+
+
+def parse_front_matter(text):
+    """拆出 front matter 和正文。支持 YAML (---) 的常用子集和 TOML (+++)。"""
+    if text.startswith("+++"):
+        end = text.find("\n+++", 3)
+        if end != -1:
+            import tomllib
+
+            return tomllib.loads(text[3:end]), text[end + 4:]
+    if not text.startswith("---"):
+        return {}, text
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}, text
+    meta = {}
+    key = None
+    for line in text[3:end].splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        item = re.match(r"^\s+-\s*(.*)$", line)
+        if item and key:
+            # 多行列表：tags:\n  - a\n  - b
+            if not isinstance(meta.get(key), list):
+                meta[key] = []
+            meta[key].append(_scalar(item.group(1)))
+            continue
+        m = re.match(r"^([\w-]+)\s*:\s*(.*)$", line)
+        if m:
+            key = m.group(1).lower()
+            meta[key] = _scalar(m.group(2))
+    return meta, text[end + 4:]
+
+
+def markdown_text(body):
+    """去掉 Markdown/HTML 语法，保留可读文字（代码块内容保留，便于搜函数名）。"""
+    body = re.sub(r"\{\{[<%].*?[%>]\}\}", " ", body, flags=re.S)        # shortcode
+    body = re.sub(r"^\s*(```|~~~).*$", " ", body, flags=re.M)          # 代码块围栏
+    body = re.sub(r"!\[([^\]]*)\]\([^)]*\)", r"\1", body)                # 图片
+    body = re.sub(r"\[([^\]]*)\]\([^)]*\)", r"\1", body)                 # 链接
+    body = re.sub(r"<[^>]+>", " ", body)
+    body = re.sub(r"^\s{0,3}(#{1,6}|>|[-*+]|\d+\.)\s+", "", body, flags=re.M)
+    body = re.sub(r"[*_`~|]+", " ", body)
+    return re.sub(r"\s+", " ", body).strip()
+
+
+def post_url(site, path, meta):
+    """按 Hugo 默认规则推算文章 URL：url > slug > 文件名（bundle 取目录名），路径小写。"""
+    if meta.get("url"):
+        return "/" + str(meta["url"]).strip("/") + "/"
+    rel = os.path.relpath(path, os.path.join(site, "content")).replace(os.sep, "/")
+    section, _, name = rel.rpartition("/")
+    if name == "index.md":
+        section, _, name = section.rpartition("/")
+    else:
+        name = name[:-len(".md")]
+    name = str(meta.get("slug") or name)
+    return "/" + "/".join(
+        re.sub(r"\s+", "-", part.strip()).lower() for part in (section, name) if part
+    ) + "/"
+
+
+def _as_list(value):
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return [str(value)] if value else []
+
+
+def parse_post(site, path):
+    """解析一篇文章，返回 (排序键, 文档, {词项: 权重})；草稿返回 None。
+
+    放在模块顶层，供进程池调用。
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        meta, body = parse_front_matter(f.read())
+    if meta.get("draft") is True:
+        return None
+    title = str(meta.get("title") or "")
+    text = markdown_text(body)
+    description = str(meta.get("description") or meta.get("summary") or "")
+    tags = _as_list(meta.get("tags")) + _as_list(meta.get("categories")) + _as_list(meta.get("keywords"))
+
+    weights = {}
+    for source, value in (("title", title), ("tags", " ".join(tags)), ("description", description), ("body", text)):
+        counts = {}
+        for term in tokenize(value):
+            counts[term] = counts.get(term, 0) + 1
+        # 词频取对数，长文里反复出现的词不会压过标题命中
+        for term, tf in counts.items():
+            weights[term] = weights.get(term, 0) + WEIGHTS[source] * (1 + math.log(tf))
+    weights = {term: max(1, round(w)) for term, w in weights.items()}
+
+    date = str(meta.get("date") or "")
+    summary = description or text[:SUMMARY_LENGTH]
+    doc = [post_url(site, path, meta), title, date[:10], summary]
+    # 新文章排在前面，id 越小越新；日期相同时按路径保证结果稳定
+    return (date, path), doc, weights
+
+
+def collect_posts(site, workers=None):
+    """并行解析站点里的所有文章，按日期从新到旧返回 [(文档, 词项权重)]。"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    paths = sorted({p for pattern in POST_GLOBS for p in glob.glob(os.path.join(site, pattern))})
+    if len(paths) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(parse_post, [site] * len(paths), paths, chunksize=16))
+    else:
+        parsed = [parse_post(site, p) for p in paths]
+    parsed = [p for p in parsed if p is not None]
+    parsed.sort(key=lambda p: p[0][1])
+    parsed.sort(key=lambda p: p[0][0], reverse=True)
+    return [(doc, weights) for _, doc, weights in parsed]
+
+
+# --- 构建索引 ---
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def _hashed(prefix, data):
+    return f"{prefix}.{hashlib.sha256(data).hexdigest()[:10]}.json"
+
+
+@dataclass
+class SearchIndex:
+    """build_index 的结果。"""
+
+    files: dict = field(default_factory=dict)  # {文件名: bytes}，包含 meta.json
+    docs: int = 0
+    terms: int = 0
+    buckets: int = 1
+
+
+def build_index(posts, shard_target=SHARD_TARGET, chunk=DOC_CHUNK):
+    """posts 为 collect_posts 的返回值。"""
+    inverted = {}
+    for doc_id, (_, weights) in enumerate(posts):
+        for term, weight in weights.items():
+            inverted.setdefault(term, []).append((doc_id, weight))
+
+    def encode(entries):
+        # 文章 id 存增量，id 递增时数字很小，JSON 更短
+        flat, last = [], 0
+        for doc_id, weight in entries:
+            flat += [doc_id - last, weight]
+            last = doc_id
+        return flat
+
+    postings = {term: encode(entries) for term, entries in inverted.items()}
+    # 用整体大小估算分片数，使单个分片大致不超过 shard_target
+    total = sum(len(term.encode("utf-8")) + 6 + 4 * len(flat) for term, flat in postings.items())
+    buckets = 1
+    while buckets < MAX_BUCKETS and total / buckets > shard_target:
+        buckets *= 2
+
+    shards = {}
+    for term, flat in postings.items():
+        shards.setdefault(shard_of(term, buckets), {})[term] = flat
+
+    index = SearchIndex(docs=len(posts), terms=len(postings), buckets=buckets)
+    meta = {"version": 1, "docs": len(posts), "buckets": buckets, "chunk": chunk, "shards": {}, "docs_files": []}
+    for key in sorted(shards):
+        data = _dumps(shards[key])
+        name = _hashed(f"s-{key}", data)
+        index.files[name] = data
+        meta["shards"][str(key)] = name
+    for start in range(0, len(posts), chunk):
+        data = _dumps([doc for doc, _ in posts[start:start + chunk]])
+        name = _hashed(f"d-{start // chunk}", data)
+        index.files[name] = data
+        meta["docs_files"].append(name)
+    index.files[installer.SEARCH_META_NAME] = _dumps(meta)
+    return index
+
+
+def write_index(index, out_dir):
+    """写入输出目录，返回 (写入数, 删除数)。
+
+    分片文件名带哈希，已存在即内容相同，直接跳过；meta.json 最后原子替换，
+    读到新 meta 的客户端一定能拿到它引用的分片，之后再删除不再引用的旧分片。
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    written = 0
+
+    def replace(name, data):
+        fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix="~", dir=out_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, os.path.join(out_dir, name))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    for name, data in sorted(index.files.items()):
+        if name == installer.SEARCH_META_NAME or os.path.exists(os.path.join(out_dir, name)):
+            continue
+        replace(name, data)
+        written += 1
+    meta = index.files[installer.SEARCH_META_NAME]
+    meta_path = os.path.join(out_dir, installer.SEARCH_META_NAME)
+    try:
+        with open(meta_path, "rb") as f:
+            meta_changed = f.read() != meta
+    except OSError:
+        meta_changed = True
+    if meta_changed:
+        replace(installer.SEARCH_META_NAME, meta)
+        written += 1
+
+    removed = 0
+    for name in os.listdir(out_dir):
+        if _SHARD_FILE_RE.match(name) and name not in index.files:
+            os.remove(os.path.join(out_dir, name))
+            removed += 1
+    return written, removed
+
+
+# --- 命令行入口 ---
+
+def build_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="为 Brutal 主题生成预构建的站内搜索索引")
+    parser.add_argument("--site", default=".", help="Hugo 站点根目录 (默认当前目录)")
+    parser.add_argument("-o", "--output", help=f"输出目录 (默认 <site>/{installer.SEARCH_INDEX_DIR})")
+    parser.add_argument("--shard-size", type=int, default=SHARD_TARGET, help="单个分片的目标字节数")
+    parser.add_argument("--workers", type=int, help="解析文章的进程数 (默认 CPU 数)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不输出统计信息")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(os.path.join(args.site, "content")):
+        print(f"❌ {args.site} 下没有 content 目录，请在 Hugo 站点根目录运行", file=sys.stderr)
+        return 2
+    posts = collect_posts(args.site, args.workers)
+    index = build_index(posts, args.shard_size)
+    out_dir = args.output or os.path.join(args.site, *installer.SEARCH_INDEX_DIR.split("/"))
+    written, removed = write_index(index, out_dir)
+    if not args.quiet:
+        sizes = [len(data) for name, data in index.files.items() if name.startswith("s-")]
+        largest = max(sizes) if sizes else 0
+        print(
+            f"🔍 {index.docs} posts, {index.terms} terms, {len(sizes)} shards "
+            f"(largest {math.ceil(largest / 1024)} KB) -> {out_dir}"
+        )
+        print(f"   written {written}, removed {removed}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
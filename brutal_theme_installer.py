@@ -1,30 +1,46 @@
+"""Brutal 主题生成器。
+
+既可以作为脚本在 Hugo 站点根目录运行，也可以作为模块导入::
+
+    from brutal_theme_installer import ThemeConfig, render_theme, MemorySink, emit
+
+    files = render_theme(ThemeConfig())      # {相对路径: bytes}，不触碰磁盘
+    emit(files, MemorySink())
+
+导入模块本身没有任何副作用（不提示、不建目录、不写文件）；argparse、
+tarfile、zipfile 等只在用到时才导入，保证 import 足够快。
+"""
+import functools
+import hashlib
+import io
+import json
 import os
+import re
 import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
 
 # 定义主题名称和路径
 THEME_NAME = "brutal"
-THEME_DIR = os.path.join("themes", THEME_NAME)
+# 内容哈希清单：记录上次生成的每个文件，用于增量写入和清理过期文件
+MANIFEST_NAME = ".brutal-manifest.json"
+# 站点根目录下的生成缓存（字体子集等），不需要提交
+CACHE_DIR_NAME = ".brutal-cache"
+# 模板源文件目录（相对站点根目录）：--eject 导出内置模板，--watch 监视其中的改动
+SOURCE_DIR_NAME = "brutal-src"
+# 导出记录（位于模板源文件目录内）：导出时每个内置模板渲染结果的内容哈希
+EJECT_RECORD_NAME = ".brutal-eject.json"
 
-# 确保在 Hugo 根目录运行
-if not os.path.exists("config.toml") and not os.path.exists("hugo.toml"):
-    print("⚠️  未检测到 hugo.toml 或 config.toml。请确保你在 Hugo 站点的根目录下运行此脚本。")
-    # 询问是否继续 (为了方便测试，允许强制继续，但在实际使用中应在根目录)
-    confirm = input("是否继续生成主题文件？(y/n): ")
-    if confirm.lower() != 'y':
-        sys.exit()
-
-# 创建目录结构
-dirs = [
-    f"{THEME_DIR}/layouts/_default",
-    f"{THEME_DIR}/layouts/partials",
-    f"{THEME_DIR}/assets/css",
-    f"{THEME_DIR}/static/images",
+# 主题目录结构（相对主题根目录）；static/images 即使为空也要创建
+THEME_DIRS = [
+    "layouts/_default",
+    "layouts/_default/_markup",
+    "layouts/partials",
+    "assets/css",
+    "static/images",
 ]
 
-for d in dirs:
-    os.makedirs(d, exist_ok=True)
-    print(f"✅ Created directory: {d}")
-
 # --- SVG 图标定义 (内联 SVG 以避免依赖) ---
 ICONS = {
     "menu": '<svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><line x1="4" y1="12" x2="20" y2="12"/><line x1="4" y1="6" x2="20" y2="6"/><line x1="4" y1="18" x2="20" y2="18"/></svg>',
@@ -37,21 +53,92 @@ ICONS = {
     "coffee": '<svg xmlns="http://www.w3.org/2000/svg" width="32" height="32" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2.5" stroke-linecap="round" stroke-linejoin="round"><path d="M17 8h1a4 4 0 1 1 0 8h-1"/><path d="M3 8h14v9a4 4 0 0 1-4 4H7a4 4 0 0 1-4-4Z"/><line x1="6" y1="2" x2="6" y2="4"/><line x1="10" y1="2" x2="10" y2="4"/><line x1="14" y1="2" x2="14" y2="4"/></svg>'
 }
 
+# --- SVG sprite ---
+# 所有图标合并成 static/images/icons.svg，模板里用 <use href> 引用，
+# 页面不再重复携带同一段 SVG，sprite 本身可以被浏览器长期缓存。
+# 首屏图标可以通过 ThemeConfig.inline_icons 继续内联，省掉首屏对 sprite 的等待。
+SPRITE_PATH = "static/images/icons.svg"
+# 绘制属性放到 sprite 的 <g> 上，引用处只保留尺寸
+_ICON_PAINT_ATTRS = ("fill", "stroke", "stroke-width", "stroke-linecap", "stroke-linejoin")
+_SVG_RE = re.compile(r"<svg\b([^>]*)>(.*)</svg>", re.S)
+_ATTR_RE = re.compile(r'([\w:-]+)="([^"]*)"')
+
+
+def split_icon(svg):
+    """把 ICONS 中的一段 SVG 拆成 (根元素属性, 内部图形)。"""
+    m = _SVG_RE.fullmatch(svg.strip())
+    if not m:
+        raise ValueError(f"无法解析的图标: {svg[:40]}...")
+    return dict(_ATTR_RE.findall(m.group(1))), m.group(2)
+
+
+@functools.lru_cache(maxsize=None)
+def icon_sprite():
+    """生成 sprite 的内容 (str)。"""
+    symbols = []
+    for name, svg in ICONS.items():
+        attrs, inner = split_icon(svg)
+        paint = " ".join(f'{k}="{attrs[k]}"' for k in _ICON_PAINT_ATTRS if k in attrs)
+        symbols.append(f'<symbol id="{name}" viewBox="{attrs["viewBox"]}"><g {paint}>{inner}</g></symbol>')
+    return '<svg xmlns="http://www.w3.org/2000/svg">' + "".join(symbols) + "</svg>\n"
+
+
+@functools.lru_cache(maxsize=None)
+def icon_sprite_version():
+    return hashlib.sha256(icon_sprite().encode("utf-8")).hexdigest()[:10]
+
+
+def icon(name, config):
+    """返回模板中使用的图标标记：首屏图标内联，其余引用 sprite。"""
+    if name in config.inline_icons:
+        return ICONS[name]
+    attrs, _ = split_icon(ICONS[name])
+    # sprite 的 URL 带内容哈希，图标变化时自动失效
+    href = f'{{{{ "images/icons.svg" | relURL }}}}?v={icon_sprite_version()}#{name}'
+    return (
+        f'<svg width="{attrs["width"]}" height="{attrs["height"]}" aria-hidden="true">'
+        f'<use href="{href}"/></svg>'
+    )
+
+
 # --- 文件内容定义 ---
 
 # 1. head.html
-file_head = """
+def head_html(config):
+    return """
 <meta charset="utf-8">
 <meta name="viewport" content="width=device-width, initial-scale=1">
 <title>{{ if .IsHome }}{{ .Site.Title }}{{ else }}{{ .Title }} | {{ .Site.Title }}{{ end }}</title>
-{{ $style := resources.Get "css/main.css" | resources.PostCSS }}
-<link rel="stylesheet" href="{{ $style.RelPermalink }}">
+{{/* 生产环境压缩 + 指纹 + SRI，并内联首屏 critical CSS，完整样式表异步加载。
+     可用 params.brutal.criticalCSS 按环境覆盖 (config/<env>/hugo.toml)。 */}}
+{{ $style := resources.Get "css/main.css" | css.PostCSS }}
+{{ $integrity := "" }}
+{{ if hugo.IsProduction }}
+  {{ $style = $style | minify | fingerprint "sha384" }}
+  {{ $integrity = $style.Data.Integrity }}
+{{ end }}
+{{ $inlineCritical := hugo.IsProduction }}
+{{ with site.Params.brutal }}{{ if isset . "criticalcss" }}{{ $inlineCritical = .criticalcss }}{{ end }}{{ end }}
+{{ if $inlineCritical }}
+{{ $critical := resources.Get "css/critical.css" | css.PostCSS | minify }}
+{{/* @font-face 的 url(../fonts/…) 相对于 css/ 目录，内联到页面后改为与 font-preload.html 相同的 relURL */}}
+<style>{{ replace $critical.Content "../fonts/" ("fonts/" | relURL) | safeCSS }}</style>
+<link rel="preload" href="{{ $style.RelPermalink }}" as="style"{{ with $integrity }} integrity="{{ . }}" crossorigin="anonymous"{{ end }}>
+<link rel="stylesheet" href="{{ $style.RelPermalink }}" media="print" onload="this.media='all'"{{ with $integrity }} integrity="{{ . }}" crossorigin="anonymous"{{ end }}>
+<noscript><link rel="stylesheet" href="{{ $style.RelPermalink }}"></noscript>
+{{ else }}
+<link rel="stylesheet" href="{{ $style.RelPermalink }}"{{ with $integrity }} integrity="{{ . }}" crossorigin="anonymous"{{ end }}>
+{{ end }}
 <meta name="description" content="{{ if .IsHome }}{{ .Site.Params.description }}{{ else }}{{ .Summary }}{{ end }}">
-"""
+""" + ('{{ partial "font-preload.html" . }}\n' if config.fonts else "")
 
 # 2. header.html (Navbar)
-file_header = f"""
-<nav class="sticky top-0 z-50 border-b-2 border-black bg-[#F3F1E5]" x-data="{{{{ open: false }}}}">
+# header/footer 只依赖站点级数据，baseof 里用 partialCached 渲染：
+# header 按语言 + 当前 section（用于高亮当前菜单）缓存，footer 只按语言缓存。
+def header_html(config):
+    return f"""
+{{{{ $current := printf "/%s/" .Section }}}}
+<nav class="sticky top-0 z-50 border-b-2 border-black bg-[#F3F1E5]">
     <div class="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8">
         <div class="flex justify-between h-16 items-center">
             <a href="{{{{ .Site.BaseURL }}}}" class="flex-shrink-0 flex items-center cursor-pointer group decoration-0">
@@ -63,7 +150,7 @@ file_header = f"""
 
             <div class="hidden md:flex items-center space-x-8">
                 {{{{ range .Site.Menus.main }}}}
-                <a href="{{{{ .URL }}}}" class="text-black font-bold hover:text-[#1d4aff] hover:underline decoration-2 underline-offset-4 transition-all">
+                <a href="{{{{ .URL }}}}"{{{{ if eq .URL $current }}}} aria-current="page"{{{{ end }}}} class="text-black font-bold hover:text-[#1d4aff] hover:underline decoration-2 underline-offset-4 transition-all{{{{ if eq .URL $current }}}} underline{{{{ end }}}}">
                     {{{{ .Name }}}}
                 </a>
                 {{{{ end }}}}
@@ -73,15 +160,15 @@ file_header = f"""
             </div>
 
             <div class="md:hidden flex items-center">
-                <button @click="open = !open" class="text-black">
-                    <span x-show="!open">{ICONS['menu']}</span>
-                    <span x-show="open" x-cloak>{ICONS['x']}</span>
+                <button type="button" class="text-black" aria-label="Menu" aria-controls="mobile-menu" aria-expanded="false" data-menu-toggle>
+                    <span data-menu-icon="closed">{icon('menu', config)}</span>
+                    <span data-menu-icon="open" hidden>{icon('x', config)}</span>
                 </button>
             </div>
         </div>
     </div>
 
-    <div x-show="open" x-cloak class="md:hidden border-t-2 border-black bg-[#F3F1E5] p-4 space-y-4">
+    <div id="mobile-menu" hidden class="md:hidden border-t-2 border-black bg-[#F3F1E5] p-4 space-y-4">
         {{{{ range .Site.Menus.main }}}}
         <a href="{{{{ .URL }}}}" class="block w-full text-left font-bold text-xl py-2 border-b border-black/10 text-black">
             {{{{ .Name }}}}
@@ -92,7 +179,8 @@ file_header = f"""
 """
 
 # 3. footer.html
-file_footer = f"""
+def footer_html(config):
+    return f"""
 <footer class="bg-black text-[#F3F1E5] py-16 px-4 mt-auto">
     <div class="max-w-7xl mx-auto grid md:grid-cols-4 gap-12">
         <div class="col-span-1 md:col-span-2">
@@ -103,12 +191,12 @@ file_footer = f"""
             <div class="flex gap-4">
                 {{{{ with .Site.Params.github }}}}
                 <a href="{{{{ . }}}}" target="_blank" class="w-10 h-10 bg-[#333] text-white flex items-center justify-center rounded hover:bg-[#1d4aff] cursor-pointer transition-colors">
-                    {ICONS['github']}
+                    {icon('github', config)}
                 </a>
                 {{{{ end }}}}
                 {{{{ with .Site.Params.twitter }}}}
                 <a href="{{{{ . }}}}" target="_blank" class="w-10 h-10 bg-[#333] text-white flex items-center justify-center rounded hover:bg-[#1d4aff] cursor-pointer transition-colors">
-                    {ICONS['twitter']}
+                    {icon('twitter', config)}
                 </a>
                 {{{{ end }}}}
             </div>
@@ -129,34 +217,39 @@ file_footer = f"""
             <div class="flex">
                 <input type="email" placeholder="Email" class="bg-[#222] border border-[#444] px-3 py-2 text-white w-full focus:outline-none focus:border-[#1d4aff]" />
                 <button class="bg-[#1d4aff] px-3 py-2 text-white font-bold border border-[#1d4aff] hover:bg-blue-600">
-                    {ICONS['arrow-right']}
+                    {icon('arrow-right', config)}
                 </button>
             </div>
         </div>
     </div>
 </footer>
-<script src="//unpkg.com/alpinejs" defer></script>
-"""
+{{{{ $menu := resources.Get "js/menu.js" | minify }}}}
+{{{{ if hugo.IsProduction }}}}{{{{ $menu = $menu | fingerprint "sha384" }}}}{{{{ end }}}}
+<script src="{{{{ $menu.RelPermalink }}}}" defer{{{{ with $menu.Data.Integrity }}}} integrity="{{{{ . }}}}" crossorigin="anonymous"{{{{ end }}}}></script>
+""" + ('{{ partial "instant-nav.html" . }}\n' if config.instant_nav else "")
 
 # 4. baseof.html (Master Template)
-file_baseof = f"""
+def baseof_html(config):
+    return f"""
 <!DOCTYPE html>
 <html lang="{{{{ .Site.Language.Lang }}}}">
 <head>
     {{{{ partial "head.html" . }}}}
+    {{{{ block "head" . }}}}{{{{ end }}}}
 </head>
 <body class="min-h-screen font-sans text-black bg-[#F3F1E5] selection:bg-[#f59e0b] selection:text-black flex flex-col">
-    {{{{ partial "header.html" . }}}}
+    {{{{ partialCached "header.html" . .Site.Language.Lang .Section }}}}
     <main class="flex-grow">
         {{{{ block "main" . }}}}{{{{ end }}}}
     </main>
-    {{{{ partial "footer.html" . }}}}
+    {{{{ partialCached "footer.html" . .Site.Language.Lang }}}}
 </body>
 </html>
 """
 
 # 5. index.html (Homepage - Hero + Bento + List)
-file_index = f"""
+def index_html(config):
+    return f"""
 {{{{ define "main" }}}}
 <!-- Hero Section -->
 <section class="relative py-20 px-4 overflow-hidden">
@@ -175,7 +268,7 @@ file_index = f"""
             </p>
             <div class="flex flex-wrap gap-4">
                 <a href="/posts" class="relative px-6 py-3 font-bold border-2 border-black bg-[#1d4aff] text-white shadow-[4px_4px_0px_0px_rgba(0,0,0,1)] hover:translate-y-[-2px] hover:translate-x-[-2px] hover:shadow-[6px_6px_0px_0px_rgba(0,0,0,1)] transition-all flex items-center gap-2 active:top-[2px] active:left-[2px] active:shadow-none">
-                    Read the Blog {ICONS['arrow-right']}
+                    Read the Blog {icon('arrow-right', config)}
                 </a>
                 <a href="{{{{ .Site.Params.github }}}}" target="_blank" class="relative px-6 py-3 font-bold border-2 border-black bg-white text-black shadow-[4px_4px_0px_0px_rgba(0,0,0,1)] hover:bg-gray-50 hover:translate-y-[-2px] hover:translate-x-[-2px] hover:shadow-[6px_6px_0px_0px_rgba(0,0,0,1)] transition-all flex items-center gap-2 active:top-[2px] active:left-[2px] active:shadow-none">
                     Github
@@ -187,11 +280,11 @@ file_index = f"""
         <div class="relative hidden md:block">
             <div class="relative w-full aspect-square">
                 <div class="absolute top-0 right-0 w-3/4 h-3/4 bg-white border-4 border-black shadow-[12px_12px_0px_0px_rgba(0,0,0,1)] flex items-center justify-center z-20">
-                   <span class="text-black">{ICONS['terminal']}</span>
+                   <span class="text-black">{icon('terminal', config)}</span>
                 </div>
                 <div class="absolute bottom-0 left-0 w-2/3 h-2/3 bg-[#1d4aff] border-4 border-black z-10"></div>
                 <div class="absolute top-10 left-10 w-20 h-20 bg-[#f59e0b] rounded-full border-4 border-black z-30 flex items-center justify-center text-white">
-                    {ICONS['code']}
+                    {icon('code', config)}
                 </div>
                 <div class="absolute bottom-10 right-20 w-32 h-4 bg-black transform -rotate-12"></div>
             </div>
@@ -211,7 +304,7 @@ file_index = f"""
         <div class="md:col-span-2 md:row-span-2 flex flex-col justify-between bg-[#FFFAE5] border-2 border-black p-6 shadow-[4px_4px_0px_0px_rgba(0,0,0,1)] transition-transform hover:-rotate-1 hover:shadow-[8px_8px_0px_0px_rgba(0,0,0,1)]">
             <div>
                 <div class="flex items-center justify-between mb-4">
-                    {ICONS['coffee']}
+                    {icon('coffee', config)}
                     <span class="font-bold text-sm bg-white border border-black px-2 py-1">NOW PLAYING</span>
                 </div>
                 <h3 class="text-3xl font-black mb-4 leading-tight">{{{{ .Site.Params.project_title | default "Building a new SaaS starter." }}}}</h3>
@@ -228,7 +321,7 @@ file_index = f"""
         <!-- Github Box -->
         <a href="{{{{ .Site.Params.github }}}}" class="md:col-span-1 bg-[#1d4aff] text-white border-2 border-black p-6 shadow-[4px_4px_0px_0px_rgba(0,0,0,1)] transition-transform hover:-rotate-1 hover:shadow-[8px_8px_0px_0px_rgba(0,0,0,1)] block">
             <div class="h-full flex flex-col items-center justify-center text-center">
-                <div class="mb-2">{ICONS['github']}</div>
+                <div class="mb-2">{icon('github', config)}</div>
                 <h4 class="text-2xl font-black">GitHub</h4>
                 <p class="text-sm opacity-90">Check my messy code</p>
             </div>
@@ -237,7 +330,7 @@ file_index = f"""
         <!-- Twitter Box -->
         <a href="{{{{ .Site.Params.twitter }}}}" class="md:col-span-1 bg-[#f59e0b] text-black border-2 border-black p-6 shadow-[4px_4px_0px_0px_rgba(0,0,0,1)] transition-transform hover:-rotate-1 hover:shadow-[8px_8px_0px_0px_rgba(0,0,0,1)] block">
             <div class="h-full flex flex-col items-center justify-center text-center">
-                <div class="mb-2">{ICONS['twitter']}</div>
+                <div class="mb-2">{icon('twitter', config)}</div>
                 <h4 class="text-2xl font-black">Twitter</h4>
                 <p class="text-sm font-bold">Rants & Thoughts</p>
             </div>
@@ -265,7 +358,7 @@ file_index = f"""
         </div>
 
         <div class="space-y-8">
-            {{{{ range first 5 (where .Site.RegularPages "Type" "posts") }}}}
+            {{{{ range first 5 (partialCached "func/posts.html" . .Site.Language.Lang) }}}}
             <div class="group relative border-b-2 border-gray-200 pb-8 last:border-0">
                 <div class="grid md:grid-cols-12 gap-6">
                     <div class="md:col-span-3">
@@ -278,7 +371,7 @@ file_index = f"""
                     </div>
                     <div class="md:col-span-9">
                         <h3 class="text-2xl md:text-3xl font-black mb-3 group-hover:text-[#1d4aff] transition-colors">
-                            <a href="{{{{ .RelPermalink }}}}">{{{{ .Title }}}}</a>
+                            <a href="{{{{ .RelPermalink }}}}"{_prefetch(config)}>{{{{ .Title }}}}</a>
                         </h3>
                         <p class="text-lg text-gray-700 mb-4 leading-relaxed">
                             {{{{ .Summary | truncate 120 }}}}
@@ -289,8 +382,8 @@ file_index = f"""
                                 <span class="text-sm font-bold mr-3 text-gray-500">#{{{{ . }}}}</span>
                                 {{{{ end }}}}
                             </div>
-                            <a href="{{{{ .RelPermalink }}}}" class="font-bold flex items-center gap-2 border-b-2 border-transparent hover:border-[#1d4aff] hover:text-[#1d4aff] transition-all">
-                                Read Post {ICONS['arrow-right']}
+                            <a href="{{{{ .RelPermalink }}}}"{_prefetch(config)} class="font-bold flex items-center gap-2 border-b-2 border-transparent hover:border-[#1d4aff] hover:text-[#1d4aff] transition-all">
+                                Read Post {icon('arrow-right', config)}
                             </a>
                         </div>
                     </div>
@@ -304,16 +397,18 @@ file_index = f"""
 """
 
 # 6. list.html (Generic List)
-file_list = f"""
+def list_html(config):
+    return f"""
 {{{{ define "main" }}}}
 <section class="py-16 px-4 bg-white min-h-screen">
     <div class="max-w-4xl mx-auto">
         <h1 class="text-6xl font-black uppercase tracking-tight mb-12 border-b-4 border-black pb-4">{{{{ .Title }}}}</h1>
+        {{{{ partialCached "search.html" . .Site.Language.Lang }}}}
         <div class="space-y-8">
             {{{{ range .Paginator.Pages }}}}
             <div class="group relative border-b-2 border-gray-200 pb-8">
                 <h3 class="text-3xl font-black mb-2 group-hover:text-[#1d4aff] transition-colors">
-                    <a href="{{{{ .RelPermalink }}}}">{{{{ .Title }}}}</a>
+                    <a href="{{{{ .RelPermalink }}}}"{_prefetch(config)}>{{{{ .Title }}}}</a>
                 </h3>
                 <div class="flex gap-4 text-sm font-bold text-gray-500 mb-4">
                     <span>{{{{ .Date.Format "Jan 02, 2006" }}}}</span>
@@ -338,7 +433,19 @@ file_list = f"""
 """
 
 # 7. single.html (Post View)
-file_single = f"""
+def single_html(config):
+    return f"""
+{{{{ define "head" }}}}
+{{{{/* 只有含代码块的文章才加载语法高亮样式。先取一次 .Content（结果有缓存），
+     render-codeblock.html 渲染代码块时会在 .Store 里留下标记 */}}}}
+{{{{ $content := .Content }}}}
+{{{{ if .Store.Get "brutalHasCode" }}}}
+{{{{ $syntax := resources.Get "css/syntax.css" | minify }}}}
+{{{{ if hugo.IsProduction }}}}{{{{ $syntax = $syntax | fingerprint "sha384" }}}}{{{{ end }}}}
+<link rel="stylesheet" href="{{{{ $syntax.RelPermalink }}}}"{{{{ with $syntax.Data.Integrity }}}} integrity="{{{{ . }}}}" crossorigin="anonymous"{{{{ end }}}}>
+{{{{ end }}}}
+{{{{ end }}}}
+
 {{{{ define "main" }}}}
 <article class="max-w-3xl mx-auto py-16 px-4 min-h-screen">
     <a href="/" class="mb-8 font-bold flex items-center gap-2 hover:-translate-x-1 transition-transform text-gray-600 hover:text-black decoration-0">
@@ -374,58 +481,1809 @@ file_single = f"""
             </div>
         </div>
     </div>
+
+    {{{{/* 相关文章由 brutal_related.py 预先算好写入 data/related.json，这里只查表 */}}}}
+    {{{{ with .File }}}}{{{{ $key := .Path }}}}{{{{ with site.Data.related }}}}{{{{ with index . $key }}}}
+    <section class="mt-16">
+        <h2 class="text-3xl font-black uppercase tracking-tight mb-6 border-b-4 border-black pb-2">Related Posts</h2>
+        <div class="grid md:grid-cols-3 gap-6">
+            {{{{ range . }}}}{{{{ with site.GetPage . }}}}
+            <a href="{{{{ .RelPermalink }}}}"{_prefetch(config)} class="block bg-white border-2 border-black p-6 shadow-[4px_4px_0px_0px_rgba(0,0,0,1)] hover:translate-y-[-2px] hover:translate-x-[-2px] hover:shadow-[6px_6px_0px_0px_rgba(0,0,0,1)] transition-all decoration-0">
+                <span class="block text-sm font-bold text-gray-500 mb-2">{{{{ .Date.Format "Jan 02, 2006" }}}}</span>
+                <span class="block text-xl font-black leading-tight text-black">{{{{ .Title }}}}</span>
+            </a>
+            {{{{ end }}}}{{{{ end }}}}
+        </div>
+    </section>
+    {{{{ end }}}}{{{{ end }}}}{{{{ end }}}}
 </article>
 {{{{ end }}}}
 """
 
-# 8. CSS & Tailwind Setup
-file_css = """
-@tailwind base;
-@tailwind components;
-@tailwind utilities;
+# 8. partials/func/posts.html
+# 返回全部文章；首页等处通过 partialCached 调用，整个站点每种语言只查询一次。
+def posts_func_html(config):
+    return """{{ return where site.RegularPages "Type" "posts" }}
+"""
+
+# 9. _markup/render-image.html (文章图片)
+# Markdown 图片经 Hugo 图片处理输出多种宽度的 WebP（可选 AVIF，需要 Hugo 支持编码 AVIF），
+# 带 srcset/sizes 和真实宽高，避免布局偏移；除第一张外都 lazy + async 解码。
+# 设置环境变量 HUGO_BRUTAL_IMAGE_REPORT=1 构建时，每张图片会在 public/brutal-image-report/ 下
+# 发布一条原图/实际下发字节数的记录，交给 --image-report 汇总。
+# sizes 对应 single.html 的版心：max-w-3xl 减去 px-4、p-8/md:p-12 和边框
+IMAGE_SIZES = "(min-width: 768px) 636px, calc(100vw - 100px)"
+IMAGE_REPORT_DIR = "brutal-image-report"
 
-@layer base {
-  body {
-    @apply antialiased;
+
+def render_image_html(config):
+    widths = " ".join(str(w) for w in config.image_widths)
+    formats = " ".join(f'"{f}"' for f in config.image_formats)
+    return """{{- $alt := .PlainText -}}
+{{- $lazy := gt .Ordinal 0 -}}
+{{- $img := false -}}
+{{- $u := urls.Parse .Destination -}}
+{{- if not $u.Host -}}
+  {{- $img = or (.Page.Resources.Get $u.Path) (resources.Get $u.Path) -}}
+{{- end -}}
+{{- if and $img (in (slice "jpeg" "png" "webp" "bmp" "tiff") $img.MediaType.SubType) -}}
+  {{- $formats := slice @FORMATS@ -}}
+  {{- $use := slice -}}
+  {{- range slice @WIDTHS@ }}{{ if le . $img.Width }}{{ $use = $use | append . }}{{ end }}{{ end -}}
+  {{- if not $use }}{{ $use = slice $img.Width }}{{ end -}}
+  {{- $largest := index $use (sub (len $use) 1) -}}
+  {{- $fallback := $img.Resize (printf "%dx" $largest) -}}
+  {{- $served := $img.Resize (printf "%dx %s" $largest (index $formats 0)) -}}
+  {{- if os.Getenv "HUGO_BRUTAL_IMAGE_REPORT" -}}
+    {{- $record := dict "src" $img.RelPermalink "original" (len $img.Content) "served" (len $served.Content) -}}
+    {{- (resources.FromString (printf "@REPORT@/%s.json" (md5 $img.RelPermalink)) (jsonify $record)).Publish -}}
+  {{- end -}}
+<picture>
+  {{- range $fmt := $formats }}
+  {{- $set := slice }}
+  {{- range $use }}{{ $r := $img.Resize (printf "%dx %s" . $fmt) }}{{ $set = $set | append (printf "%s %dw" $r.RelPermalink $r.Width) }}{{ end }}
+  <source type="image/{{ $fmt }}" srcset="{{ delimit $set ", " }}" sizes="@SIZES@">
+  {{- end }}
+  <img src="{{ $fallback.RelPermalink }}" width="{{ $fallback.Width }}" height="{{ $fallback.Height }}" alt="{{ $alt }}"{{ with .Title }} title="{{ . }}"{{ end }}{{ if $lazy }} loading="lazy" decoding="async"{{ else }} fetchpriority="high"{{ end }}>
+</picture>
+{{- else -}}
+<img src="{{ .Destination | safeURL }}" alt="{{ $alt }}"{{ with .Title }} title="{{ . }}"{{ end }}{{ if $lazy }} loading="lazy" decoding="async"{{ end }}>
+{{- end -}}
+""".replace("@WIDTHS@", widths).replace("@FORMATS@", formats).replace(
+        "@SIZES@", IMAGE_SIZES).replace("@REPORT@", IMAGE_REPORT_DIR)
+
+
+def image_report(public):
+    """汇总 public/brutal-image-report/ 下的记录：原图字节数 vs 实际下发的最大变体字节数。"""
+    images = {}
+    directory = os.path.join(public, IMAGE_REPORT_DIR)
+    for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as f:
+            record = json.load(f)
+        images[record["src"]] = (record["original"], record["served"])
+    original = sum(o for o, _ in images.values())
+    served = sum(s for _, s in images.values())
+    return len(images), original, served
+
+
+# 9b. _markup/render-codeblock.html + css/syntax.css (代码高亮)
+# Chroma 默认给每个 token 内联 style，代码多的文章 HTML 因此膨胀好几倍。
+# 主题的 [markup] 配置不会被 Hugo 合并，所以用代码块渲染钩子强制 noClasses=false，
+# 颜色由单独的 syntax.css 提供（单独指纹、长期缓存，只在含代码的文章页加载）。
+# params.brutal.inlineHighlight = true 可恢复内联 style（--highlight-report 用它生成对照组）。
+# 空白、标点、普通标识符在配色里就是正文颜色，Chroma 仍会给它们各包一层 span
+# （内联模式下这些 token 没有 style，不包），这里拆掉，否则 class 模式反而更大。
+# 正则里的引号写成 \"，模板文本不像 class="…" 属性，extract_classes 不会把它当成 class。
+SYNTAX_PLAIN = ("w", "p", "o", "n", "nx", "nv", "vc", "vg", "vi")
+
+
+def render_codeblock_html(config):
+    plain = "|".join(SYNTAX_PLAIN)
+    return f"""{{{{ $inline := false }}}}
+{{{{/* 参数也可能来自环境变量 (字符串)，统一按 "true" 判断 */}}}}
+{{{{ with site.Params.brutal }}}}{{{{ if isset . "inlinehighlight" }}}}{{{{ $inline = eq (string .inlinehighlight) "true" }}}}{{{{ end }}}}{{{{ end }}}}
+{{{{ .Page.Store.Set "brutalHasCode" true }}}}
+{{{{ $html := (transform.HighlightCodeBlock . (dict "noClasses" $inline)).Wrapped }}}}
+{{{{ if not $inline }}}}{{{{ $html = replaceRE `<span class=\\"(?:{plain})\\">([^<]*)</span>` "${{1}}" $html | safeHTML }}}}{{{{ end }}}}
+{{{{ $html }}}}
+"""
+
+
+# Chroma token class -> 样式，配色取自主题的黑 / 米白 / 琥珀 / 蓝
+SYNTAX_PALETTE = {
+    "color:#f59e0b;font-weight:700": "k kc kd kn kp kr kt nt ow",
+    "color:#8fa8ff": "na nb bp nc nd ne nf fm nl",
+    "color:#fef08a": "s sa sb sc dl sd s2 sh si sx sr s1 ss ld",
+    "color:#fdba74": "l m mb mf mh mi il mo se no",
+    "color:#9ca3af;font-style:italic": "c ch cm c1 cs cp cpf gu",
+    "color:#fca5a5": "gd",
+    "color:#86efac": "gi",
+    "color:#ff5f5f;background-color:#3b0a0a": "err",
+    "font-style:italic": "ge",
+    "font-weight:700": "gs gh",
+}
+
+
+def syntax_css(config):
+    rules = "\n".join(
+        ",".join(f".chroma .{cls}" for cls in classes.split()) + f"{{{style}}}"
+        for style, classes in SYNTAX_PALETTE.items()
+    )
+    return f"""/* 代码高亮（Chroma class 模式）；由 brutal_theme_installer.py 生成 */
+.highlight{{margin:1.75em 0;border:2px solid #000;box-shadow:4px 4px 0 0 #000}}
+.highlight pre{{margin:0;border-radius:0;padding:1em 1.25em;overflow-x:auto}}
+.chroma{{color:#F3F1E5;background-color:#111;-webkit-text-size-adjust:none}}
+.chroma .lntd{{vertical-align:top;padding:0;margin:0;border:0}}
+.chroma .lntable{{border-spacing:0;padding:0;margin:0;border:0}}
+.chroma .hl{{background-color:#2a2a2a;box-shadow:inset 3px 0 0 #f59e0b}}
+.chroma .lnt,.chroma .ln{{white-space:pre;user-select:none;margin-right:.4em;padding:0 .4em;color:#6b7280}}
+.chroma .lnlinks{{outline:none;text-decoration:none;color:inherit}}
+.chroma .line{{display:flex}}
+{rules}
+"""
+
+
+# 9c. 即时导航 (可选，--instant-nav)
+# instant.js：悬停/聚焦/触摸文章链接 (data-prefetch) 时预取，链接进入视口后空闲时预取少量文章；
+# 开启了省流量 (Save-Data) 或 2G 网络时不预取。生产环境同时注册 service worker。
+# sw.js：生成时计算预缓存清单（sprite、字体、首页、最近的文章，各带内容哈希作为 revision），
+# Hugo 构建时再经 resources.ExecuteAsTemplate 填入带指纹的 main.css / JS 地址，发布到站点根目录。
+# 清单变化 -> sw.js 内容变化 -> 浏览器安装新版本，只重新下载 revision 变化的条目。
+# 运行时只有文件名带指纹（或带 ?v=）的资源走缓存优先，其余同源资源网络优先，离线时才回退到缓存。
+INSTANT_NAV_PATH = "layouts/partials/instant-nav.html"
+SW_PATH = "assets/js/sw.js"
+
+
+def _prefetch(config):
+    return " data-prefetch" if config.instant_nav else ""
+
+
+def instant_nav_html(config):
+    return """{{ $nav := resources.Get "js/instant.js" | minify }}
+{{ $sw := false }}
+{{ if hugo.IsProduction }}
+  {{ $nav = $nav | fingerprint "sha384" }}
+  {{/* service worker 的地址必须固定（否则旧注册不会被替换），minify 会加 .min 后缀，所以重新建一个资源 */}}
+  {{ $min := resources.Get "js/sw.js" | resources.ExecuteAsTemplate "js/sw.js" . | minify }}
+  {{ $sw = resources.FromString "sw.js" $min.Content }}
+{{ end }}
+<script src="{{ $nav.RelPermalink }}" defer{{ with $sw }} data-sw="{{ .RelPermalink }}"{{ end }}{{ with $nav.Data.Integrity }} integrity="{{ . }}" crossorigin="anonymous"{{ end }}></script>
+"""
+
+
+def instant_js(config):
+    return """(function () {
+  var script = document.currentScript;
+  var sw = script && script.getAttribute("data-sw");
+  if (sw && "serviceWorker" in navigator) {
+    window.addEventListener("load", function () {
+      navigator.serviceWorker.register(sw).catch(function () {});
+    });
   }
+
+  var conn = navigator.connection;
+  if (conn && (conn.saveData || /2g/.test(conn.effectiveType || ""))) return;
+  var probe = document.createElement("link");
+  var native = probe.relList && probe.relList.supports && probe.relList.supports("prefetch");
+  var seen = {};
+
+  function prefetch(a) {
+    var url = a.href.split("#")[0];
+    if (seen[url] || a.origin !== location.origin || url === location.href.split("#")[0]) return;
+    seen[url] = true;
+    if (native) {
+      var link = document.createElement("link");
+      link.rel = "prefetch";
+      link.href = url;
+      document.head.appendChild(link);
+    } else {
+      fetch(url, { credentials: "same-origin" }).catch(function () {});
+    }
+  }
+  function target(e) {
+    return e.target.closest ? e.target.closest("a[data-prefetch]") : null;
+  }
+
+  // 悬停超过 65ms 才算意图，划过列表时不预取
+  var timer;
+  document.addEventListener("mouseover", function (e) {
+    var a = target(e);
+    if (!a) return;
+    clearTimeout(timer);
+    timer = setTimeout(function () { prefetch(a); }, 65);
+  }, { passive: true });
+  document.addEventListener("mouseout", function (e) {
+    var a = target(e);
+    if (a && !a.contains(e.relatedTarget)) clearTimeout(timer);
+  }, { passive: true });
+  ["touchstart", "focusin"].forEach(function (type) {
+    document.addEventListener(type, function (e) {
+      var a = target(e);
+      if (a) prefetch(a);
+    }, { passive: true });
+  });
+
+  // 进入视口的文章链接在空闲时预取，每页最多 4 篇
+  if (!("IntersectionObserver" in window)) return;
+  var budget = 4;
+  var idle = window.requestIdleCallback || function (cb) { return setTimeout(cb, 300); };
+  var observer = new IntersectionObserver(function (entries) {
+    entries.forEach(function (entry) {
+      if (!entry.isIntersecting || budget <= 0) return;
+      observer.unobserve(entry.target);
+      budget--;
+      idle(function () { prefetch(entry.target); });
+    });
+    if (budget <= 0) observer.disconnect();
+  });
+  document.querySelectorAll("a[data-prefetch]").forEach(function (a) { observer.observe(a); });
+})();
+"""
+
+
+def precache_manifest(config, files):
+    """生成时计算的预缓存清单 [(相对站点根的 URL, revision)]，以及清单整体的版本号。
+
+    文章页的 revision 由文章源文件、主题全部文件和站点配置的内容哈希组成，
+    任何一项变化都会让对应页面重新下载。
+    """
+    import glob
+
+    import brutal_search
+
+    theme = hashlib.sha256()
+    for path in sorted(files):
+        theme.update(f"{path}\0{content_hash(files[path])}\n".encode("utf-8"))
+    for name in ("hugo.toml", "config.toml", "data/related.json"):
+        path = os.path.join(config.site, *name.split("/"))
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                theme.update(f.read())
+    theme = theme.hexdigest()
+
+    entries = [(f"images/icons.svg?v={icon_sprite_version()}", content_hash(files[SPRITE_PATH])[:16])]
+    entries += sorted(
+        (path[len("static/"):], content_hash(data)[:16])
+        for path, data in files.items() if path.startswith(FONT_DIR + "/")
+    )
+
+    posts = []
+    for pattern in brutal_search.POST_GLOBS:
+        for path in glob.glob(os.path.join(config.site, pattern)):
+            with open(path, "rb") as f:
+                data = f.read()
+            meta, _ = brutal_search.parse_front_matter(data.decode("utf-8"))
+            if meta.get("draft") is True:
+                continue
+            url = brutal_search.post_url(config.site, path, meta).lstrip("/")
+            posts.append((str(meta.get("date") or ""), url, content_hash(data + theme.encode())[:16]))
+    posts.sort(reverse=True)
+    recent = [(url, rev) for _, url, rev in posts[:config.precache_posts]]
+    # 首页列出最近的文章，revision 跟着它们变
+    home = hashlib.sha256((theme + "".join(rev for _, rev in recent)).encode()).hexdigest()[:16]
+    entries += [("", home)] + recent
+    version = hashlib.sha256(json.dumps(entries).encode()).hexdigest()[:12]
+    return entries, version
+
+
+def service_worker_js(config, entries, version):
+    manifest = json.dumps(entries, ensure_ascii=False, separators=(",", ":"))
+    return """{{/* 生成时的预缓存清单 + Hugo 构建时带指纹的核心资源 */}}
+{{- $style := resources.Get "css/main.css" | css.PostCSS | minify | fingerprint "sha384" -}}
+{{- $menu := resources.Get "js/menu.js" | minify | fingerprint "sha384" -}}
+{{- $nav := resources.Get "js/instant.js" | minify | fingerprint "sha384" -}}
+var VERSION = "@VERSION@";
+// [相对 scope 的 URL, revision]
+var PRECACHE = @MANIFEST@;
+// 文件名带指纹，URL 本身就是 revision
+var CORE = [{{ $style.RelPermalink | jsonify }}, {{ $menu.RelPermalink | jsonify }}, {{ $nav.RelPermalink | jsonify }}];
+
+function hash(text) {
+  for (var h = 0, i = 0; i < text.length; i++) h = (h * 31 + text.charCodeAt(i)) >>> 0;
+  return h.toString(36);
+}
+// 核心资源的指纹变了也要换一个新的预缓存
+var PRECACHE_NAME = "brutal-precache-" + VERSION + "-" + hash(CORE.join("|"));
+var RUNTIME_NAME = "brutal-runtime";
+var RUNTIME_LIMIT = 120;
+var IMMUTABLE = /\\.[0-9a-f]{8,}\\.\\w+$|[?&]v=/;
+var scope = self.registration.scope;
+var precached = {};
+
+function absolute(url) {
+  return new URL(url, scope).href;
 }
+PRECACHE.forEach(function (entry) {
+  precached[absolute(entry[0])] = absolute(entry[0]) + (entry[0].indexOf("?") < 0 ? "?" : "&") + "__rev=" + entry[1];
+});
+CORE.forEach(function (url) {
+  precached[absolute(url)] = absolute(url);
+});
+
+self.addEventListener("install", function (event) {
+  event.waitUntil(caches.open(PRECACHE_NAME).then(function (cache) {
+    return Promise.all(Object.keys(precached).map(function (url) {
+      var key = precached[url];
+      // revision 没变的条目从旧版本的缓存里直接复制
+      return caches.match(key).then(function (hit) {
+        if (hit) return cache.put(key, hit);
+        return fetch(url, { cache: "reload", credentials: "same-origin" }).then(function (response) {
+          if (response.ok) return cache.put(key, response);
+        });
+      }).catch(function () {});
+    }));
+  }).then(function () {
+    return self.skipWaiting();
+  }));
+});
+
+self.addEventListener("activate", function (event) {
+  event.waitUntil(caches.keys().then(function (names) {
+    return Promise.all(names.filter(function (name) {
+      return name.indexOf("brutal-precache-") === 0 && name !== PRECACHE_NAME;
+    }).map(function (name) {
+      return caches.delete(name);
+    }));
+  }).then(function () {
+    return self.clients.claim();
+  }));
+});
+
+function trim(cache) {
+  cache.keys().then(function (keys) {
+    for (var i = 0; i < keys.length - RUNTIME_LIMIT; i++) cache.delete(keys[i]);
+  });
+}
+
+// key: 预缓存条目的键；给出时写回预缓存（否则更新后的页面永远读不到），不给时写入运行时缓存
+function fromNetwork(request, key) {
+  return fetch(request).then(function (response) {
+    if (response.ok && response.type === "basic") {
+      var copy = response.clone();
+      caches.open(key ? PRECACHE_NAME : RUNTIME_NAME).then(function (cache) {
+        cache.put(key || request, copy).then(function () {
+          if (!key) trim(cache);
+        });
+      });
+    }
+    return response;
+  });
+}
+
+self.addEventListener("fetch", function (event) {
+  var request = event.request;
+  if (request.method !== "GET") return;
+  var url = new URL(request.url);
+  if (url.origin !== location.origin) return;
+  url.hash = "";
+  var href = url.href.replace(/index\\.html$/, "");
+  var html = request.mode === "navigate" || (request.headers.get("Accept") || "").indexOf("text/html") >= 0;
+
+  if (precached[href] && !html) {
+    event.respondWith(caches.match(precached[href]).then(function (hit) {
+      return hit || fromNetwork(request);
+    }));
+    return;
+  }
+  if (html) {
+    // 页面：有缓存（预缓存或预取过）立即返回，同时后台更新同一个缓存条目，下次访问即是新内容；
+    // 离线且没有缓存时回退到首页
+    event.respondWith(caches.match(precached[href] || request).then(function (hit) {
+      var network = fromNetwork(request, precached[href]);
+      if (hit) {
+        event.waitUntil(network.catch(function () {}));
+        return hit;
+      }
+      return network.catch(function () {
+        return caches.match(precached[absolute("")]).then(function (home) {
+          return home || Response.error();
+        });
+      });
+    }));
+    return;
+  }
+  if (IMMUTABLE.test(url.pathname + url.search)) {
+    // 文件名带指纹 (main.<hash>.css、搜索分片等) 或带 ?v=：内容不会变，缓存优先
+    event.respondWith(caches.match(request).then(function (hit) {
+      return hit || fromNetwork(request);
+    }));
+    return;
+  }
+  // 其他同源资源 (search/meta.json、index.xml、未加指纹的图片等)：网络优先，离线时才用缓存
+  event.respondWith(fromNetwork(request).catch(function () {
+    return caches.match(request).then(function (hit) {
+      return hit || Response.error();
+    });
+  }));
+});
+""".replace("@VERSION@", version).replace("@MANIFEST@", manifest)
+
+
+# 10. menu.js
+# 移动端菜单开关。原先为这一个开关从 unpkg 加载整个 Alpine.js（未锁版本，
+# 每次访问都多一次第三方 DNS/TLS），现在改为自托管的几行原生 JS，defer 加载，不阻塞渲染。
+def menu_js(config):
+    return """(function () {
+  var toggle = document.querySelector("[data-menu-toggle]");
+  if (!toggle) return;
+  var panel = document.getElementById(toggle.getAttribute("aria-controls"));
+  var icons = toggle.querySelectorAll("[data-menu-icon]");
+  function set(open) {
+    toggle.setAttribute("aria-expanded", String(open));
+    panel.hidden = !open;
+    for (var i = 0; i < icons.length; i++) {
+      icons[i].hidden = (icons[i].getAttribute("data-menu-icon") === "open") !== open;
+    }
+  }
+  toggle.addEventListener("click", function () {
+    set(toggle.getAttribute("aria-expanded") !== "true");
+  });
+  document.addEventListener("keydown", function (e) {
+    if (e.key === "Escape") set(false);
+  });
+})();
+"""
+
+# 11. CSS & Tailwind Setup
+# 使用 Tailwind v4 的 CSS 配置：source(none) 关闭文件系统扫描，
+# 生成时从模板中提取出的 class 通过 @source inline() 直接告诉 Tailwind，
+# 输出的 main.css 因此只由模板内容决定，也不依赖主题所在的目录名。
+def main_css(config, classes, fonts=None):
+    font_faces = fonts.css if fonts else ""
+    font_stack = ", ".join([f"'{f}'" for f in (fonts.families if fonts else ["Inter"])] + ["sans-serif"])
+    safelist = " ".join(classes).replace("\\", "\\\\").replace('"', '\\"')
+    return f"""
+@import "tailwindcss" source(none);
+@plugin "@tailwindcss/typography";
+
+@source inline("{safelist}");
+{font_faces}
+@theme {{
+  --font-sans: {font_stack};
+}}
+
+@layer base {{
+  body {{
+    @apply antialiased;
+  }}
+}}
+"""
+
+
+# 12. partials/search.html + search.js
+# 站点内搜索。倒排索引由 brutal_search.py 在构建前预先生成到站点的 static/search/，
+# 按词项前缀分片；浏览器只下载查询词所在的分片和命中文章所在的摘要块，
+# 不在客户端构建索引。站点里没有索引时不渲染搜索框。
+SEARCH_INDEX_DIR = "static/search"
+SEARCH_META_NAME = "meta.json"
+# 参与分词的 CJK 字符（假名、汉字、韩文），brutal_search.py 和 search.js 共用
+SEARCH_CJK_CLASS = r"\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+
+
+def search_html(config):
+    meta = SEARCH_INDEX_DIR.split("/", 1)[1] + "/" + SEARCH_META_NAME
+    return f"""
+{{{{ if os.FileExists "{SEARCH_INDEX_DIR}/{SEARCH_META_NAME}" }}}}
+{{{{ $search := site.Params.search | default dict }}}}
+{{{{ $js := resources.Get "js/search.js" | minify }}}}
+{{{{ if hugo.IsProduction }}}}{{{{ $js = $js | fingerprint "sha384" }}}}{{{{ end }}}}
+<div data-search data-index="{{{{ "{meta}" | relURL }}}}" data-limit="{{{{ $search.maxResultLength | default 10 }}}}" class="mb-12">
+    <input type="search" placeholder="{{{{ $search.placeholder | default "搜索文章..." }}}}" aria-label="Search" autocomplete="off" class="w-full px-4 py-3 text-lg font-bold border-2 border-black bg-white shadow-[4px_4px_0px_0px_rgba(0,0,0,1)] focus:outline-none focus:border-[#1d4aff]">
+    <p data-search-status hidden class="mt-4 font-bold text-gray-500"></p>
+    <ol data-search-results class="mt-6 space-y-6"></ol>
+    <template>
+        <li class="border-b-2 border-gray-200 pb-6">
+            <a data-field="title" class="text-2xl font-black hover:text-[#1d4aff] transition-colors"></a>
+            <div data-field="date" class="text-sm font-bold text-gray-500 mt-1"></div>
+            <p data-field="summary" class="text-gray-700 mt-2"></p>
+        </li>
+    </template>
+</div>
+<script src="{{{{ $js.RelPermalink }}}}" defer{{{{ with $js.Data.Integrity }}}} integrity="{{{{ . }}}}" crossorigin="anonymous"{{{{ end }}}}></script>
+{{{{ end }}}}
+"""
+
+
+# 分词、分片规则必须和 brutal_search.py 保持一致：
+# NFKC + 小写；ASCII 字母数字按词切分，CJK 连续片段切成二元组（单字保留单字）；
+# 词项的分片 = hash(前缀) % buckets，ASCII 词前缀取 2 个字符，CJK 取 1 个字符。
+# 查询的最后一个词还没输完时做前缀匹配，同前缀的词都在同一个分片里。
+def search_js(config):
+    return """(function () {
+  var root = document.querySelector("[data-search]");
+  if (!root) return;
+  var input = root.querySelector("input");
+  var list = root.querySelector("[data-search-results]");
+  var status = root.querySelector("[data-search-status]");
+  var item = root.querySelector("template").content.firstElementChild;
+  var metaURL = root.getAttribute("data-index");
+  var dir = metaURL.slice(0, metaURL.lastIndexOf("/") + 1);
+  var limit = parseInt(root.getAttribute("data-limit"), 10) || 10;
+  var WORD = /[a-z0-9]+|[""" + SEARCH_CJK_CLASS + """]+/g;
+  var files = {};
+  var meta = null;
+  var seq = 0;
+
+  function json(url, fresh) {
+    return fetch(url, fresh ? { cache: "no-cache" } : {}).then(function (r) {
+      if (!r.ok) throw new Error(r.status + " " + url);
+      return r.json();
+    });
+  }
+  function load(name) {
+    if (!files[name]) {
+      files[name] = json(dir + name).catch(function (e) {
+        delete files[name];
+        meta = null;  // 分片文件名带内容哈希，404 说明索引已更新，重新拉取 meta
+        throw e;
+      });
+    }
+    return files[name];
+  }
+  function getMeta() {
+    if (!meta) {
+      meta = json(metaURL, true).catch(function (e) {
+        meta = null;
+        throw e;
+      });
+    }
+    return meta;
+  }
+  function ascii(term) {
+    var c = term.charCodeAt(0);
+    return c < 128;
+  }
+  function shardOf(term, buckets) {
+    var prefix = ascii(term) ? term.slice(0, 2) : term.charAt(0);
+    var h = 0;
+    for (var i = 0; i < prefix.length; i++) h = (h * 31 + prefix.charCodeAt(i)) >>> 0;
+    return String(h % buckets);
+  }
+  function tokenize(text) {
+    var out = [];
+    var runs = text.normalize("NFKC").toLowerCase().match(WORD) || [];
+    for (var i = 0; i < runs.length; i++) {
+      var run = runs[i];
+      if (ascii(run) || run.length === 1) {
+        out.push(run);
+      } else {
+        for (var j = 0; j + 1 < run.length; j++) out.push(run.slice(j, j + 2));
+      }
+    }
+    return out;
+  }
+
+  function postings(shard, term, prefix, docs) {
+    var found = {};
+    for (var key in shard) {
+      if (key === term || (prefix && key.lastIndexOf(term, 0) === 0)) {
+        var list = shard[key];
+        var idf = Math.log(1 + docs / (list.length / 2));
+        for (var i = 0, id = 0; i < list.length; i += 2) {
+          id += list[i];
+          found[id] = Math.max(found[id] || 0, list[i + 1] * idf);
+        }
+      }
+    }
+    return found;
+  }
+
+  function rank(index, shards, terms, prefix) {
+    var scores = {};
+    var hits = {};
+    terms.forEach(function (term, i) {
+      var shard = shards[index.shards[shardOf(term, index.buckets)]] || {};
+      var found = postings(shard, term, prefix && i === terms.length - 1, index.docs);
+      for (var id in found) {
+        scores[id] = (scores[id] || 0) + found[id];
+        hits[id] = (hits[id] || 0) + 1;
+      }
+    });
+    var ids = Object.keys(scores);
+    // 优先返回包含全部查询词的文章，没有时退化为按相关度排序的部分匹配
+    var all = ids.filter(function (id) { return hits[id] === terms.length; });
+    return (all.length ? all : ids)
+      .sort(function (a, b) { return scores[b] - scores[a] || a - b; })
+      .slice(0, limit)
+      .map(Number);
+  }
+
+  function render(docs, chunk, ids, token) {
+    if (token !== seq) return;
+    list.textContent = "";
+    ids.forEach(function (id) {
+      var doc = docs[Math.floor(id / chunk)][id % chunk];
+      var li = item.cloneNode(true);
+      var link = li.querySelector("[data-field=title]");
+      link.href = doc[0];
+      link.textContent = doc[1];
+      li.querySelector("[data-field=date]").textContent = doc[2];
+      li.querySelector("[data-field=summary]").textContent = doc[3];
+      list.appendChild(li);
+    });
+    status.hidden = ids.length > 0;
+    status.textContent = ids.length ? "" : "没有找到相关文章";
+  }
+
+  function search(query) {
+    var token = ++seq;
+    var terms = tokenize(query).filter(function (t, i, all) { return all.indexOf(t) === i; });
+    if (!terms.length) {
+      list.textContent = "";
+      status.hidden = true;
+      return;
+    }
+    var last = terms[terms.length - 1];
+    var prefix = !/\\s$/.test(query) && (ascii(last) ? last.length >= 2 : last.length === 1);
+    getMeta().then(function (index) {
+      var names = {};
+      terms.forEach(function (t) {
+        var name = index.shards[shardOf(t, index.buckets)];
+        if (name) names[name] = true;
+      });
+      var wanted = Object.keys(names);
+      return Promise.all(wanted.map(load)).then(function (loaded) {
+        var shards = {};
+        wanted.forEach(function (name, i) { shards[name] = loaded[i]; });
+        var ids = rank(index, shards, terms, prefix);
+        var chunks = ids.map(function (id) { return Math.floor(id / index.chunk); })
+          .filter(function (c, i, all) { return all.indexOf(c) === i; });
+        return Promise.all(chunks.map(function (c) { return load(index.docs_files[c]); })).then(function (loaded) {
+          var docs = {};
+          chunks.forEach(function (c, i) { docs[c] = loaded[i]; });
+          render(docs, index.chunk, ids, token);
+        });
+      });
+    }).catch(function () {
+      if (token !== seq) return;
+      status.hidden = false;
+      status.textContent = "搜索暂时不可用";
+    });
+  }
+
+  var timer;
+  input.addEventListener("input", function () {
+    clearTimeout(timer);
+    timer = setTimeout(function () { search(input.value); }, 120);
+  });
+  // 聚焦时预取 meta，首次输入时少一次往返
+  input.addEventListener("focus", function () { getMeta().catch(function () {}); }, { once: true });
+})();
 """
 
-# 写入文件
-files = [
-    (f"{THEME_DIR}/layouts/_default/baseof.html", file_baseof),
-    (f"{THEME_DIR}/layouts/_default/list.html", file_list),
-    (f"{THEME_DIR}/layouts/_default/single.html", file_single),
-    (f"{THEME_DIR}/layouts/index.html", file_index),
-    (f"{THEME_DIR}/layouts/partials/head.html", file_head),
-    (f"{THEME_DIR}/layouts/partials/header.html", file_header),
-    (f"{THEME_DIR}/layouts/partials/footer.html", file_footer),
-    (f"{THEME_DIR}/assets/css/main.css", file_css),
+
+# --- Tailwind class 提取 ---
+CLASS_MANIFEST_PATH = "tailwind-classes.json"
+_CLASS_ATTR_RE = re.compile(r'\bclass="([^"]*)"')
+_GO_TEMPLATE_RE = re.compile(r"\{\{.*?\}\}", re.S)
+
+
+# 首屏区域：{模板路径: 结束标记}，标记之前的内容属于首屏，None 表示整个模板
+CRITICAL_SECTIONS = {
+    "layouts/_default/baseof.html": None,
+    "layouts/partials/header.html": None,
+    "layouts/index.html": "<!-- Bento Grid -->",
+    "layouts/_default/list.html": '<div class="space-y-8">',
+    "layouts/_default/single.html": "<!-- Content -->",
+    # 列表页标题下方的搜索框（partialCached 渲染，不在 list.html 里）
+    "layouts/partials/search.html": None,
+}
+
+
+def extract_classes(files, sections=None):
+    """从渲染好的 HTML 模板中提取所有 utility class（含 shadow-[...] 这类任意值），排序去重。
+
+    给定 sections（格式同 CRITICAL_SECTIONS）时只扫描其中列出的模板片段。
+    """
+    classes = set()
+    for path, data in files.items():
+        if not path.endswith(".html"):
+            continue
+        text = data.decode("utf-8")
+        if sections is not None:
+            if path not in sections:
+                continue
+            marker = sections[path]
+            if marker is not None:
+                text = text.split(marker, 1)[0]
+        for value in _CLASS_ATTR_RE.findall(text):
+            # class 属性里的 Go 模板表达式不是 class，先去掉
+            classes.update(_GO_TEMPLATE_RE.sub(" ", value).split())
+    return sorted(classes)
+
+
+# --- 字体子集化 ---
+# 站点是 zh-CN，完整的 CJK 字体动辄数 MB。这里扫描文章和模板实际用到的字符，
+# 用 fontTools 为每个字体生成 WOFF2 子集，按 unicode-range 切成多个分片，
+# 浏览器只下载页面上出现的字符所在的分片。
+# 分片方案会缓存下来：新文章带来新字符时，旧分片保持不变（URL 也不变，缓存继续有效），
+# 新字符追加到最后一个分片或新分片，只有这些分片需要重新生成。
+FONT_DIR = "static/fonts"
+# 收集字符的来源（相对站点根目录），站点配置里有菜单名等中文
+FONT_TEXT_GLOBS = ("content/**/*.md", "hugo.toml", "config.toml")
+_STRING_LITERAL_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"|`[^`]*`|\'(?:[^\'\\\n]|\\.)*\'')
+FONT_PRELOAD_PATH = "layouts/partials/font-preload.html"
+_CJK_RANGES = (
+    (0x2E80, 0x303F),    # CJK 部首、标点
+    (0x3040, 0x30FF),    # 假名
+    (0x3100, 0x312F),    # 注音
+    (0x3190, 0x31FF),
+    (0x3400, 0x4DBF),    # 扩展 A
+    (0x4E00, 0x9FFF),    # 基本汉字
+    (0xAC00, 0xD7AF),    # 韩文
+    (0xF900, 0xFAFF),    # 兼容汉字
+    (0xFE30, 0xFE4F),    # 竖排标点
+    (0xFF00, 0xFFEF),    # 全角字符
+    (0x20000, 0x2FA1F),  # 扩展 B 及以后
+)
+
+
+@dataclass(frozen=True)
+class FontSource:
+    """一个需要子集化的字体：CSS 中的 family 名和源字体文件 (TTF/OTF) 路径。"""
+
+    family: str
+    path: str
+
+
+@dataclass
+class FontBuild:
+    """字体子集化的结果。"""
+
+    families: list = field(default_factory=list)
+    files: dict = field(default_factory=dict)   # {主题内路径: woff2 bytes}
+    css: str = ""                               # @font-face 规则
+    preload: list = field(default_factory=list)  # 需要 preload 的 URL（相对站点根，如 fonts/x.woff2）
+    report: list = field(default_factory=list)
+
+
+def is_cjk(cp):
+    return any(lo <= cp <= hi for lo, hi in _CJK_RANGES)
+
+
+def collect_codepoints(site, files):
+    """统计站点内容和模板中每个字符出现的次数。"""
+    import glob
+
+    counts = {}
+
+    def add(text):
+        for ch in text:
+            cp = ord(ch)
+            if cp >= 0x20:
+                counts[cp] = counts.get(cp, 0) + 1
+
+    for pattern in FONT_TEXT_GLOBS:
+        for path in sorted(glob.glob(os.path.join(site, pattern), recursive=True)):
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                add(f.read())
+    for path, data in files.items():
+        text = data.decode("utf-8")
+        if path.endswith(".html"):
+            # 模板表达式里的字符串字面量（如 default "搜索文章..."）会显示出来，先单独收集
+            for expr in _GO_TEMPLATE_RE.findall(text):
+                add(" ".join(_STRING_LITERAL_RE.findall(expr)))
+            # 再去掉标签和 Go 模板表达式，只保留会显示出来的文字
+            add(re.sub(r"<[^>]*>", " ", _GO_TEMPLATE_RE.sub(" ", text)))
+        elif path.startswith("assets/js/") and path.endswith(".js"):
+            # 脚本里显示给用户的文字都在字符串里（如 search.js 的状态提示），注释不计
+            add(" ".join(_STRING_LITERAL_RE.findall(text)))
+    return counts
+
+
+def plan_shards(counts, previous, shard_size):
+    """把字符分配到分片。
+
+    previous 为上次的分片方案；已有分片原样保留，只给新字符分配位置。
+    首次生成时分片 0 放所有非 CJK 字符，CJK 字符按出现频率从高到低切片，
+    常用字集中在前面的分片里。
+    """
+    shards = [list(shard) for shard in previous]
+    known = {cp for shard in shards for cp in shard}
+    fresh = sorted((cp for cp in counts if cp not in known), key=lambda cp: (-counts[cp], cp))
+    latin = [cp for cp in fresh if not is_cjk(cp)]
+    cjk = [cp for cp in fresh if is_cjk(cp)]
+    if latin:
+        if shards:
+            shards[0].extend(latin)
+        else:
+            shards.append(latin)
+    # 新 CJK 字符先填满最后一个 CJK 分片，再开新分片
+    open_cjk = bool(shards) and any(is_cjk(cp) for cp in shards[-1])
+    for cp in cjk:
+        if not open_cjk or len(shards[-1]) >= shard_size:
+            shards.append([])
+            open_cjk = True
+        shards[-1].append(cp)
+    return [sorted(shard) for shard in shards if shard]
+
+
+def unicode_range(codepoints):
+    """[0x41, 0x42, 0x43, 0x4E00] -> 'U+41-43,U+4E00'"""
+    parts = []
+    cps = sorted(codepoints)
+    i = 0
+    while i < len(cps):
+        j = i
+        while j + 1 < len(cps) and cps[j + 1] == cps[j] + 1:
+            j += 1
+        parts.append(f"U+{cps[i]:X}" if i == j else f"U+{cps[i]:X}-{cps[j]:X}")
+        i = j + 1
+    return ",".join(parts)
+
+
+def _require_fonttools():
+    try:
+        import fontTools.subset  # noqa: F401
+        import brotli  # noqa: F401
+    except ImportError:
+        raise SystemExit("❌ 字体子集化需要 fontTools 和 brotli: pip install fonttools brotli")
+
+
+def subset_font(path, codepoints):
+    """生成只包含 codepoints 的 WOFF2 子集 (bytes)。放在模块顶层以便进程池调用。"""
+    import logging
+
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    # 不认识的表 (如 FFTM) 会被丢弃，fontTools 对此的 warning 没有意义
+    logging.getLogger("fontTools.subset").setLevel(logging.ERROR)
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]
+    options.name_IDs = []
+    options.notdef_outline = True
+    font = TTFont(path, lazy=True)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    buf = io.BytesIO()
+    font.flavor = "woff2"
+    font.save(buf)
+    return buf.getvalue()
+
+
+def _font_face_props(path):
+    """读取源字体的字重/样式，可变字体输出字重范围。"""
+    from fontTools.ttLib import TTFont
+
+    font = TTFont(path, lazy=True)
+    cmap = set(font.getBestCmap() or {})
+    weight = str(font["OS/2"].usWeightClass) if "OS/2" in font else "400"
+    if "fvar" in font:
+        for axis in font["fvar"].axes:
+            if axis.axisTag == "wght":
+                weight = f"{axis.minValue:g} {axis.maxValue:g}"
+    italic = "OS/2" in font and font["OS/2"].fsSelection & 1
+    return cmap, weight, "italic" if italic else "normal"
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "font"
+
+
+def build_fonts(config, counts):
+    """按 config.fonts 生成字体子集、@font-face 规则和 preload 列表。
+
+    config.cache_dir 不为空时缓存分片方案和已生成的 WOFF2，实现增量构建。
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    _require_fonttools()
+    result = FontBuild()
+    cache = os.path.join(config.cache_dir, "fonts") if config.cache_dir else None
+    if cache:
+        os.makedirs(cache, exist_ok=True)
+    covered = set()
+    faces = []
+    jobs = {}
+
+    for source in config.fonts:
+        with open(source.path, "rb") as f:
+            source_hash = content_hash(f.read())
+        cmap, weight, style = _font_face_props(source.path)
+        # 前面的字体已经覆盖的字符，浏览器不会再用后面的字体渲染
+        usable = {cp: n for cp, n in counts.items() if cp in cmap and cp not in covered}
+        covered.update(usable)
+
+        slug = _slug(source.family)
+        plan_path = os.path.join(cache, f"{slug}.json") if cache else None
+        previous = []
+        if plan_path and os.path.exists(plan_path):
+            with open(plan_path, "r", encoding="utf-8") as f:
+                plan = json.load(f)
+            if plan.get("source") == source_hash:
+                previous = plan["shards"]
+        shards = plan_shards(usable, previous, config.font_shard_size)
+        if plan_path:
+            with open(plan_path, "w", encoding="utf-8") as f:
+                json.dump({"source": source_hash, "shards": shards}, f, separators=(",", ":"))
+
+        for index, shard in enumerate(shards):
+            key = content_hash(f"{source_hash}:{unicode_range(shard)}".encode("utf-8"))
+            faces.append((source, slug, index, shard, key, weight, style))
+            cached = os.path.join(cache, f"{key}.woff2") if cache else None
+            if cached and os.path.exists(cached):
+                with open(cached, "rb") as f:
+                    jobs[key] = f.read()
+            elif key not in jobs:
+                jobs[key] = (source.path, shard)
+        result.families.append(source.family)
+
+    pending = {k: v for k, v in jobs.items() if isinstance(v, tuple)}
+    if pending:
+        # fontTools 是纯 Python，分片之间用进程池并行
+        with ProcessPoolExecutor() as pool:
+            futures = {k: pool.submit(subset_font, *v) for k, v in pending.items()}
+            for key, future in futures.items():
+                jobs[key] = future.result()
+                if cache:
+                    with open(os.path.join(cache, f"{key}.woff2"), "wb") as f:
+                        f.write(jobs[key])
+
+    rules = []
+    for source, slug, index, shard, key, weight, style in faces:
+        data = jobs[key]
+        name = f"{slug}-{index}.{content_hash(data)[:8]}.woff2"
+        result.files[f"{FONT_DIR}/{name}"] = data
+        rules.append(
+            "@font-face {\n"
+            f"  font-family: '{source.family}';\n"
+            f"  font-style: {style};\n"
+            f"  font-weight: {weight};\n"
+            "  font-display: swap;\n"
+            # 相对于发布后的 css/ 目录，站点部署在子路径下也能找到；内联的 critical CSS 由 head.html 改写
+            f'  src: url("../fonts/{name}") format("woff2");\n'
+            f"  unicode-range: {unicode_range(shard)};\n"
+            "}\n"
+        )
+
+    # 每个字体 preload 字符出现频率最高的那个分片
+    for source in config.fonts:
+        own = [face for face in faces if face[0] is source]
+        if own:
+            best = max(own, key=lambda face: sum(counts.get(cp, 0) for cp in face[3]))
+            result.preload.append(f"fonts/{_slug(source.family)}-{best[2]}.{content_hash(jobs[best[4]])[:8]}.woff2")
+        size = sum(len(jobs[face[4]]) for face in own)
+        result.report.append(
+            f"{source.family}: {len(own)} shards, {sum(len(face[3]) for face in own)} glyphs, "
+            f"{size} B (source {os.path.getsize(source.path)} B), rebuilt "
+            f"{sum(1 for face in own if face[4] in pending)}"
+        )
+    result.css = "\n" + "\n".join(rules) if rules else ""
+    return result
+
+
+def font_preload_html(fonts):
+    return "".join(
+        f'<link rel="preload" href="{{{{ "{url}" | relURL }}}}" as="font" type="font/woff2" crossorigin>\n'
+        for url in fonts.preload
+    )
+
+
+# 输出文件列表（相对主题根目录）
+TEMPLATES = [
+    ("layouts/_default/baseof.html", baseof_html),
+    ("layouts/_default/list.html", list_html),
+    ("layouts/_default/single.html", single_html),
+    ("layouts/index.html", index_html),
+    ("layouts/partials/head.html", head_html),
+    ("layouts/partials/header.html", header_html),
+    ("layouts/partials/footer.html", footer_html),
+    ("layouts/partials/func/posts.html", posts_func_html),
+    ("layouts/_default/_markup/render-image.html", render_image_html),
+    ("layouts/_default/_markup/render-codeblock.html", render_codeblock_html),
+    ("assets/css/syntax.css", syntax_css),
+    ("assets/js/menu.js", menu_js),
+    ("layouts/partials/search.html", search_html),
+    ("assets/js/search.js", search_js),
 ]
 
-for path, content in files:
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
-    print(f"📄 Generated: {path}")
-
-print("\n✨ 主题文件生成完毕！")
-print("--------------------------------------------------")
-print("👉 接下来你需要做的事情：")
-print("1. 确保安装了 Tailwind CSS (Hugo 内置了 PostCSS 支持，但你需要安装依赖)")
-print("   npm init -y")
-print("   npm install -D tailwindcss postcss autoprefixer")
-print("2. 初始化 Tailwind 配置:")
-print("   npx tailwindcss init")
-print("3. 修改 tailwind.config.js，确保 content 包含主题目录:")
-print(f"""
-   module.exports = {{
-     content: ["./layouts/**/*.html", "./themes/{THEME_NAME}/layouts/**/*.html"],
-     theme: {{
-       extend: {{}},
-     }},
-     plugins: [require('@tailwindcss/typography')],
-   }}
+
+@dataclass(frozen=True)
+class ThemeConfig:
+    """生成参数。"""
+
+    name: str = THEME_NAME
+    # 需要内联的图标（通常是首屏可见的图标），其余图标都从 sprite 引用
+    inline_icons: tuple = ("menu", "x")
+    # Hugo 站点根目录，用于读取文章等内容
+    site: str = "."
+    # 需要子集化的字体 (FontSource)，按 font-family 回退顺序排列
+    fonts: tuple = ()
+    font_shard_size: int = 500
+    # 文章图片输出的宽度和格式（按优先级），见 render-image.html
+    image_widths: tuple = (480, 768, 1200, 1600)
+    image_formats: tuple = ("webp",)
+    # 增量构建缓存目录；None 表示不缓存
+    cache_dir: str = None
+    # 模板源文件目录：其中的文件按相对路径覆盖内置模板（也可以新增文件）；None 表示只用内置模板
+    source_dir: str = None
+    # 即时导航：预取文章页 + service worker 预缓存最近 precache_posts 篇文章
+    instant_nav: bool = False
+    precache_posts: int = 10
+
+
+def theme_templates(config):
+    """本次生成用到的内置模板 [(路径, 渲染函数)]，包括按配置启用的可选模板。"""
+    templates = list(TEMPLATES)
+    if config.instant_nav:
+        templates += [(INSTANT_NAV_PATH, instant_nav_html), ("assets/js/instant.js", instant_js)]
+    return templates
+
+
+def render_templates(config):
+    """渲染内置模板，再叠加 config.source_dir 中的源文件。"""
+    files = {path: render(config).encode("utf-8") for path, render in theme_templates(config)}
+    if config.source_dir:
+        files.update(read_sources(config.source_dir))
+    return files
+
+
+def render_theme(config=None, stats=None):
+    """把主题渲染到内存，返回 ``{相对路径: bytes}``，路径使用 ``/`` 分隔。
+
+    传入 stats (dict) 时，各生成阶段的报告会写入其中，例如 ``stats["fonts"]``。
+    """
+    config = config or ThemeConfig()
+    return finish_theme(config, render_templates(config), stats)
+
+
+def finish_theme(config, templates, stats=None):
+    """在模板之上生成派生文件（sprite、字体子集、CSS、class 清单），返回新的 dict。
+
+    派生文件总是重新生成，源文件目录里的同名文件不会生效。
+    """
+    files = dict(templates)
+    files[SPRITE_PATH] = icon_sprite().encode("utf-8")
+    fonts = None
+    if config.fonts:
+        fonts = build_fonts(config, collect_codepoints(config.site, files))
+        files.update(fonts.files)
+        files[FONT_PRELOAD_PATH] = font_preload_html(fonts).encode("utf-8")
+        if stats is not None:
+            stats["fonts"] = fonts.report
+    # main.css 依赖模板里用到的 class，必须在所有模板渲染完之后生成
+    classes = extract_classes(files)
+    files["assets/css/main.css"] = main_css(config, classes, fonts).encode("utf-8")
+    critical = extract_classes(files, CRITICAL_SECTIONS)
+    files["assets/css/critical.css"] = main_css(config, critical, fonts).encode("utf-8")
+    files[CLASS_MANIFEST_PATH] = (json.dumps(classes, separators=(",", ":")) + "\n").encode("utf-8")
+    if config.instant_nav:
+        # 预缓存清单依赖其余所有文件的内容哈希，最后生成
+        entries, version = precache_manifest(config, files)
+        files[SW_PATH] = service_worker_js(config, entries, version).encode("utf-8")
+        if stats is not None:
+            stats["precache"] = entries
+    return files
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@dataclass
+class EmitReport:
+    """一次输出的结果：每个列表里是相对主题根目录的路径。"""
+
+    added: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    skipped: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+
+    def summary(self):
+        return (
+            f"added {len(self.added)}, changed {len(self.changed)}, "
+            f"skipped {len(self.skipped)}, removed {len(self.removed)}"
+        )
+
+
+# --- 输出目标 (sink) ---
+# 每个 sink 实现 write(files) -> EmitReport，files 为 render_theme 的返回值。
+
+class MemorySink:
+    """写入内存映射，适合预览和测试。"""
+
+    def __init__(self, files=None):
+        self.files = {} if files is None else files
+
+    def write(self, files):
+        report = EmitReport()
+        for path, data in sorted(files.items()):
+            old = self.files.get(path)
+            if old == data:
+                report.skipped.append(path)
+                continue
+            (report.added if old is None else report.changed).append(path)
+            self.files[path] = data
+        for path in sorted(set(self.files) - set(files)):
+            del self.files[path]
+            report.removed.append(path)
+        return report
+
+
+class DirectorySink:
+    """写入主题目录，基于内容哈希清单增量更新。
+
+    只写内容有变化的文件，未变化的文件保持 mtime 不变，
+    这样 hugo server 和 Tailwind 不会因为重复运行而全量重建。
+
+    变化的文件先在线程池中并行写入同目录下的临时文件并 fsync，
+    全部成功后再集中 os.replace 到目标路径，最后每个目录只 fsync 一次。
+    watcher 因此不会读到写了一半的 baseof.html / main.css，
+    一批文件几乎在同一时刻可见；任何一个写入失败则整批都不替换。
+    """
+
+    def __init__(self, root, verbose=False, workers=None, fsync=True):
+        self.root = root
+        self.verbose = verbose
+        self.workers = workers
+        self.fsync = fsync
+        self._mode = 0o644
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+
+    def _abspath(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    def load_manifest(self):
+        """读取上次生成的清单；不存在或损坏时视为首次生成。"""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(manifest, dict) or not isinstance(manifest.get("files"), dict):
+            return {}
+        return manifest["files"]
+
+    def save_manifest(self, entries):
+        data = json.dumps({"version": 1, "files": entries}, indent=2, sort_keys=True) + "\n"
+        tmp = self._write_temp(self.manifest_path, data.encode("utf-8"))
+        os.replace(tmp, self.manifest_path)
+
+    def is_unchanged(self, path, digest, entry):
+        """判断磁盘上的文件是否已经是目标内容。
+
+        清单哈希相同且 size/mtime 未变时直接跳过；若文件被外部修改过，
+        再读取一次磁盘内容比对，避免误跳过。
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if entry and entry.get("sha256") == digest:
+            if entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+                return True
+        with open(path, "rb") as f:
+            return content_hash(f.read()) == digest
+
+    def remove_stale(self, path):
+        """删除旧模板集遗留的文件，并清理因此变空的目录（不越过主题根目录）。"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        parent = os.path.dirname(path)
+        root = os.path.abspath(self.root)
+        while os.path.abspath(parent).startswith(root + os.sep):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+
+    def _write_temp(self, path, data):
+        """把 data 写入 path 同目录下的临时文件并返回其路径（同一文件系统才能原子 rename）。"""
+        directory, name = os.path.split(path)
+        # 以 "." 开头、"~" 结尾，hugo 和多数 watcher 都会忽略这类文件
+        fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix="~", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.chmod(tmp, self._mode)
+        except BaseException:
+            _unlink_quietly(tmp)
+            raise
+        return tmp
+
+    def _fsync_dirs(self, paths):
+        if not self.fsync or not hasattr(os, "O_DIRECTORY"):
+            return
+        for directory in sorted({os.path.dirname(p) for p in paths}):
+            fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def write(self, files):
+        from concurrent.futures import ThreadPoolExecutor
+
+        for d in THEME_DIRS:
+            os.makedirs(self._abspath(d), exist_ok=True)
+
+        # mkstemp 创建的文件权限是 0600，按 umask 还原成普通文件的权限
+        umask = os.umask(0)
+        os.umask(umask)
+        self._mode = 0o666 & ~umask
+
+        previous = self.load_manifest()
+        report = EmitReport()
+        keys = list(files)
+        digests = {key: content_hash(files[key]) for key in keys}
+
+        def check(key):
+            return self.is_unchanged(self._abspath(key), digests[key], previous.get(key))
+
+        def stage(key):
+            path = self._abspath(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            return path, os.path.exists(path), self._write_temp(path, files[key])
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            unchanged = dict(zip(keys, pool.map(check, keys)))
+            dirty = [key for key in keys if not unchanged[key]]
+            futures = [pool.submit(stage, key) for key in dirty]
+            staged = []
+            failed = None
+            for future in futures:
+                try:
+                    staged.append(future.result())
+                except BaseException as exc:
+                    failed = failed or exc
+            if failed is not None:
+                for _, _, tmp in staged:
+                    _unlink_quietly(tmp)
+                raise failed
+
+        # 所有临时文件都已落盘，集中 rename，让整批文件在同一时刻对 watcher 可见
+        for key, (path, existed, tmp) in zip(dirty, staged):
+            os.replace(tmp, path)
+            (report.changed if existed else report.added).append(key)
+            self._log(f"📄 Generated: {path}")
+        self._fsync_dirs(path for path, _, _ in staged)
+        report.skipped.extend(key for key in keys if unchanged[key])
+
+        entries = {}
+        for key in keys:
+            st = os.stat(self._abspath(key))
+            entries[key] = {"sha256": digests[key], "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+        for key in sorted(set(previous) - set(entries)):
+            path = self._abspath(key)
+            if os.path.exists(path):
+                self.remove_stale(path)
+                report.removed.append(key)
+                self._log(f"🗑️  Removed stale: {path}")
+
+        if previous != entries:
+            self.save_manifest(entries)
+        return report
+
+
+def _unlink_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class TarSink:
+    """以流的方式写出 tar 包；fileobj 可以是 sys.stdout.buffer 等不可 seek 的流。"""
+
+    def __init__(self, fileobj, prefix="", compression="gz"):
+        self.fileobj = fileobj
+        self.prefix = prefix
+        self.mode = f"w|{compression}" if compression else "w|"
+
+    def write(self, files):
+        import tarfile
+
+        report = EmitReport()
+        mtime = time.time()
+        with tarfile.open(fileobj=self.fileobj, mode=self.mode) as tar:
+            for path, data in sorted(files.items()):
+                info = tarfile.TarInfo(self.prefix + path)
+                info.size = len(data)
+                info.mtime = mtime
+                info.mode = 0o644
+                tar.addfile(info, io.BytesIO(data))
+                report.added.append(path)
+        return report
+
+
+class ZipSink:
+    """写出 zip 包。"""
+
+    def __init__(self, fileobj, prefix=""):
+        self.fileobj = fileobj
+        self.prefix = prefix
+
+    def write(self, files):
+        import zipfile
+
+        report = EmitReport()
+        with zipfile.ZipFile(self.fileobj, "w", zipfile.ZIP_DEFLATED) as zf:
+            for path, data in sorted(files.items()):
+                zf.writestr(self.prefix + path, data)
+                report.added.append(path)
+        return report
+
+
+def emit(files, sink):
+    """把渲染结果交给 sink 输出，返回 EmitReport。"""
+    return sink.write(files)
+
+
+# --- 模板源文件与 watch 模式 ---
+# 模板平时以函数形式写在本文件里；--eject 把它们导出成 brutal-src/ 下的独立文件，
+# 之后编辑这些文件即可。--watch 轮询该目录，改动平息 (debounce) 后只替换改动的模板，
+# 重新计算派生文件，再交给 DirectorySink：内容没变的输出不写，变化的一批文件原子替换，
+# 正在运行的 hugo server 每次看到的都是一致的一批文件。
+
+def _is_source_file(name):
+    # 跳过编辑器的临时文件和备份文件
+    return not (name.startswith(".") or name.endswith(("~", ".swp", ".swx", ".tmp")))
+
+
+def source_snapshot(source_dir):
+    """{相对路径: (mtime_ns, size)}，用于轮询比较。"""
+    snapshot = {}
+    for dirpath, dirnames, filenames in os.walk(source_dir):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for name in filenames:
+            if not _is_source_file(name):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            key = os.path.relpath(path, source_dir).replace(os.sep, "/")
+            snapshot[key] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+def read_sources(source_dir):
+    files = {}
+    for key in source_snapshot(source_dir):
+        with open(os.path.join(source_dir, *key.split("/")), "rb") as f:
+            files[key] = f.read()
+    return files
+
+
+def _load_eject_record(source_dir):
+    try:
+        with open(os.path.join(source_dir, EJECT_RECORD_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def eject_templates(config, source_dir):
+    """把内置模板写成 source_dir 下的独立文件；已存在的文件不覆盖。返回写入的路径。
+
+    导出的文件是按 config 渲染好的结果（图片格式、内联图标、字体 preload 等都已固定），
+    所以同时在 EJECT_RECORD_NAME 中记下渲染结果的哈希，供 stale_sources 检查。
+    """
+    record = _load_eject_record(source_dir)
+    written = []
+    for path, render in theme_templates(config):
+        target = os.path.join(source_dir, *path.split("/"))
+        if os.path.exists(target):
+            continue
+        text = render(config)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(text)
+        record[path] = content_hash(text.encode("utf-8"))
+        written.append(path)
+    if written:
+        with open(os.path.join(source_dir, EJECT_RECORD_NAME), "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return written
+
+
+def stale_sources(config):
+    """config.source_dir 中按导出时的配置渲染、而当前配置会渲染出不同内容的模板路径。
+
+    这些文件会覆盖内置模板，使新选项（如 --image-formats、--instant-nav）对它们不生效。
+    没有导出记录的文件（手写或旧版本导出）无法判断，不会列出。
+    """
+    record = _load_eject_record(config.source_dir)
+    sources = source_snapshot(config.source_dir)
+    return sorted(
+        path for path, render in theme_templates(config)
+        if path in sources and path in record
+        and record[path] != content_hash(render(config).encode("utf-8"))
+    )
+
+
+class ThemeWatcher:
+    """监视 config.source_dir，增量重新生成主题并写入 sink。"""
+
+    def __init__(self, config, sink, interval=0.2, debounce=0.3):
+        self.config = config
+        self.sink = sink
+        self.interval = interval
+        self.debounce = debounce
+        self.builtin = dict(theme_templates(config))
+        self.templates = render_templates(config)
+        self.snapshot = source_snapshot(config.source_dir)
+
+    def poll(self):
+        """返回自上次轮询以来新增、修改或删除的源文件。"""
+        current = source_snapshot(self.config.source_dir)
+        changed = {k for k in current.keys() | self.snapshot.keys() if current.get(k) != self.snapshot.get(k)}
+        self.snapshot = current
+        return changed
+
+    def apply(self, changed):
+        """只重新读取/渲染改动的模板；删除的源文件回退到内置模板。"""
+        for key in changed:
+            path = os.path.join(self.config.source_dir, *key.split("/"))
+            try:
+                with open(path, "rb") as f:
+                    self.templates[key] = f.read()
+            except FileNotFoundError:
+                if key in self.builtin:
+                    self.templates[key] = self.builtin[key](self.config).encode("utf-8")
+                else:
+                    self.templates.pop(key, None)
+        return self.sink.write(finish_theme(self.config, self.templates))
+
+    def run(self, log=print):
+        pending = set()
+        last_event = 0.0
+        while True:
+            time.sleep(self.interval)
+            changed = self.poll()
+            if changed:
+                pending |= changed
+                last_event = time.monotonic()
+                continue
+            if not pending or time.monotonic() - last_event < self.debounce:
+                continue
+            started = time.perf_counter()
+            try:
+                report = self.apply(pending)
+            except Exception as exc:  # 模板写错不应该让 watch 退出
+                log(f"❌ {exc}")
+            else:
+                outputs = report.added + report.changed + report.removed
+                elapsed = (time.perf_counter() - started) * 1000
+                log(f"♻️  {', '.join(sorted(pending))} -> {len(outputs)} outputs ({elapsed:.0f} ms)")
+                for key in outputs:
+                    log(f"   {key}")
+            pending = set()
+
+# --- CSS 体积报告 ---
+
+def compile_css(source, site):
+    """用站点自己的 PostCSS 工具链 (postcss-cli + @tailwindcss/postcss) 编译 CSS。
+
+    工具链不可用或编译失败时返回 None。
+    """
+    import subprocess
+
+    postcss = os.path.join(site, "node_modules", ".bin", "postcss")
+    if not os.path.exists(postcss):
+        return None
+    try:
+        proc = subprocess.run(
+            [postcss, "--no-map"], input=source, cwd=site, capture_output=True, timeout=300,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return proc.stdout if proc.returncode == 0 else None
+
+
+def css_report(files, site):
+    """统计 critical CSS（内联）和完整样式表（异步加载）的 class 数与编译后字节数。"""
+    import gzip
+
+    counts = {
+        "assets/css/critical.css": len(extract_classes(files, CRITICAL_SECTIONS)),
+        "assets/css/main.css": len(extract_classes(files)),
+    }
+    lines = []
+    for label, path in (("critical (inline)", "assets/css/critical.css"), ("main (deferred)", "assets/css/main.css")):
+        css = compile_css(files[path], site)
+        if css is None:
+            size = "未找到可用的 node_modules/.bin/postcss，跳过编译"
+        else:
+            size = f"{len(css)} B, gzip {len(gzip.compress(css, 9))} B"
+        lines.append(f"{label}: {counts[path]} classes, {size}")
+    return lines
+
+
+def _build_public(site, theme, hugo, env=None):
+    """用指定主题构建一次站点到临时目录，返回目录路径（调用方负责删除）。"""
+    import subprocess
+
+    out = tempfile.mkdtemp(prefix="brutal-public-")
+    proc = subprocess.run(
+        [hugo, "--minify", "--theme", theme, "-s", site, "-d", out],
+        env={**os.environ, **(env or {})}, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        import shutil
+
+        shutil.rmtree(out, ignore_errors=True)
+        raise RuntimeError(f"hugo 构建失败:\n{proc.stdout[-2000:]}{proc.stderr[-2000:]}")
+    return out
+
+
+def highlight_report(site, theme, hugo="hugo"):
+    """分别以内联 style 和 class 模式构建站点，对比含代码的文章页 HTML 字节数。"""
+    import gzip
+    import shutil
+
+    before = _build_public(site, theme, hugo, {"HUGO_PARAMS_BRUTAL_INLINEHIGHLIGHT": "true"})
+    try:
+        after = _build_public(site, theme, hugo)
+    except BaseException:
+        shutil.rmtree(before, ignore_errors=True)
+        raise
+    try:
+        lines = []
+        total = [0, 0, 0, 0]
+        for dirpath, _, filenames in sorted(os.walk(after)):
+            if "index.html" not in filenames:
+                continue
+            rel = os.path.relpath(os.path.join(dirpath, "index.html"), after)
+            with open(os.path.join(after, rel), "rb") as f:
+                new = f.read()
+            if b"chroma" not in new:
+                continue
+            with open(os.path.join(before, rel), "rb") as f:
+                old = f.read()
+            sizes = [len(old), len(new), len(gzip.compress(old, 9)), len(gzip.compress(new, 9))]
+            total = [a + b for a, b in zip(total, sizes)]
+            lines.append(f"{rel}: {sizes[0]} B -> {sizes[1]} B ({sizes[1] / sizes[0] - 1:+.0%}), gzip {sizes[2]} B -> {sizes[3]} B")
+        if not lines:
+            return ["没有找到含代码块的页面"]
+        syntax = 0
+        for dirpath, _, filenames in os.walk(os.path.join(after, "css")):
+            syntax += sum(os.path.getsize(os.path.join(dirpath, n)) for n in filenames if n.startswith("syntax"))
+        lines.append(
+            f"total ({len(lines)} pages): {total[0]} B -> {total[1]} B ({total[1] / total[0] - 1:+.0%}), "
+            f"gzip {total[2]} B -> {total[3]} B; syntax.css {syntax} B (cached once)"
+        )
+        return lines
+    finally:
+        shutil.rmtree(before, ignore_errors=True)
+        shutil.rmtree(after, ignore_errors=True)
+
+
+# --- 命令行入口 ---
+
+def print_next_steps(theme_name):
+    print("\n✨ 主题文件生成完毕！")
+    print("--------------------------------------------------")
+    print("👉 接下来你需要做的事情：")
+    print("1. 确保安装了 Tailwind CSS v4 (Hugo 内置了 PostCSS 支持，但你需要安装依赖)")
+    print("   npm install -D tailwindcss @tailwindcss/postcss @tailwindcss/typography postcss autoprefixer")
+    print("2. postcss.config.js 中启用 @tailwindcss/postcss:")
+    print("""
+   module.exports = {
+     plugins: {
+       '@tailwindcss/postcss': {},
+       autoprefixer: {},
+     },
+   }
 """)
-print("4. 在 hugo.toml 中启用主题:")
-print(f'   theme = "{THEME_NAME}"')
-print("--------------------------------------------------")
\ No newline at end of file
+    print(f"3. 主题用到的 class 已写入 themes/{theme_name}/{CLASS_MANIFEST_PATH} 并内联进 main.css，")
+    print("   Tailwind 不再扫描文件系统，tailwind.config.js 的 content 无需包含主题目录")
+    print("4. 在 hugo.toml 中启用主题:")
+    print(f'   theme = "{theme_name}"')
+    print("5. 构建前生成搜索索引 (写入 static/search/，文章列表页会显示搜索框):")
+    print("   python brutal_search.py")
+    print("6. 代码块由主题的渲染钩子输出 class，颜色在 syntax.css 中；如果也用 highlight shortcode，")
+    print("   在 hugo.toml 中设置 [markup.highlight] noClasses = false 保持一致")
+    print(f"7. 修改主题：--eject 把模板导出到 {SOURCE_DIR_NAME}/，再运行 --watch 并同时开着 hugo server，")
+    print("   保存模板即增量生成")
+    print("8. 加 --instant-nav 启用悬停预取和 Service Worker (生产构建 /sw.js，预缓存首页和最近文章)")
+    print("9. hugo --minify 之后运行 python brutal_audit.py 检查各模板的页面体积、重复标记和 main.css 覆盖率，")
+    print("   预算写在站点根目录的 brutal-budgets.json 中，超出时返回 1")
+    print("--------------------------------------------------")
+
+
+def build_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="生成 Brutal Hugo 主题")
+    parser.add_argument("--site", default=".", help="Hugo 站点根目录 (默认: 当前目录)")
+    parser.add_argument("--name", default=THEME_NAME, help=f"主题名称 (默认: {THEME_NAME})")
+    parser.add_argument(
+        "--format", choices=["dir", "tar", "zip"], default="dir",
+        help="输出方式：写入 themes/<name> 目录，或打包为 tar.gz / zip",
+    )
+    parser.add_argument(
+        "--inline-icons", default=",".join(ThemeConfig.inline_icons),
+        help="逗号分隔的内联图标名，其余图标从 sprite 引用；'all' 表示全部内联",
+    )
+    parser.add_argument("-o", "--output", help="tar/zip 输出路径，'-' 表示标准输出")
+    parser.add_argument(
+        "--font", action="append", default=[], metavar="FAMILY=PATH",
+        help="子集化字体，可重复，按回退顺序给出，如 --font Inter=fonts/Inter.ttf --font 'Noto Sans SC=fonts/NotoSansSC.otf'",
+    )
+    parser.add_argument("--font-shard-size", type=int, default=ThemeConfig.font_shard_size, help="每个 CJK 分片的字符数")
+    parser.add_argument(
+        "--image-formats", default=",".join(ThemeConfig.image_formats),
+        help="文章图片输出格式，逗号分隔，按优先级排列 (如 avif,webp；avif 需要 Hugo 支持)",
+    )
+    parser.add_argument(
+        "--image-report", metavar="PUBLIC",
+        help="汇总 HUGO_BRUTAL_IMAGE_REPORT=1 构建产生的图片字节数记录后退出 (如 public)",
+    )
+    parser.add_argument(
+        "--css-report", action="store_true",
+        help="用站点的 PostCSS 编译 critical/main CSS 并报告字节数",
+    )
+    parser.add_argument(
+        "--highlight-report", action="store_true",
+        help="生成后用 hugo 分别以内联 style / class 模式构建站点，报告含代码文章页的字节数变化",
+    )
+    parser.add_argument("--hugo", default="hugo", help="--highlight-report 使用的 hugo 可执行文件")
+    parser.add_argument(
+        "--source", metavar="DIR",
+        help=f"模板源文件目录，其中的文件覆盖内置模板 (--eject/--watch 默认使用 <site>/{SOURCE_DIR_NAME})",
+    )
+    parser.add_argument("--eject", action="store_true", help="把内置模板导出到模板源文件目录后退出（不覆盖已有文件）")
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="生成后持续监视模板源文件目录，改动时增量重新生成 (配合 hugo server 使用)",
+    )
+    parser.add_argument(
+        "--instant-nav", action="store_true",
+        help="启用即时导航：悬停/视口预取文章页 (尊重 Save-Data)，生产环境注册预缓存 service worker",
+    )
+    parser.add_argument(
+        "--precache-posts", type=int, default=ThemeConfig.precache_posts,
+        help=f"service worker 预缓存的最近文章数 (默认: {ThemeConfig.precache_posts})",
+    )
+    parser.add_argument("-y", "--yes", action="store_true", help="不询问，直接生成")
+    parser.add_argument("-q", "--quiet", action="store_true", help="只输出错误")
+    return parser
+
+
+def confirm_site_root(site, assume_yes):
+    """确保在 Hugo 根目录运行；非交互环境下不提示，直接失败。"""
+    if any(os.path.exists(os.path.join(site, n)) for n in ("config.toml", "hugo.toml")):
+        return True
+    print("⚠️  未检测到 hugo.toml 或 config.toml。请确保你在 Hugo 站点的根目录下运行此脚本。", file=sys.stderr)
+    if assume_yes:
+        return True
+    if not sys.stdin.isatty():
+        print("   非交互模式下请使用 --yes 强制生成。", file=sys.stderr)
+        return False
+    # 询问是否继续 (为了方便测试，允许强制继续，但在实际使用中应在根目录)
+    confirm = input("是否继续生成主题文件？(y/n): ")
+    return confirm.lower() == 'y'
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.image_report:
+        count, original, served = image_report(args.image_report)
+        saved = original - served
+        ratio = f" ({saved / original:.0%})" if original else ""
+        print(f"🖼️  {count} images: original {original} B, served {served} B, saved {saved} B{ratio}")
+        return 0
+
+    if args.inline_icons == "all":
+        inline_icons = tuple(ICONS)
+    else:
+        inline_icons = tuple(n for n in args.inline_icons.split(",") if n)
+    unknown = [n for n in inline_icons if n not in ICONS]
+    if unknown:
+        print(f"❌ 未知图标: {', '.join(unknown)}（可选: {', '.join(ICONS)}）", file=sys.stderr)
+        return 2
+    fonts = []
+    for spec in args.font:
+        family, sep, path = spec.partition("=")
+        if not sep or not os.path.isfile(path):
+            print(f"❌ 无效的 --font: {spec}（格式 FAMILY=PATH，且文件必须存在）", file=sys.stderr)
+            return 2
+        fonts.append(FontSource(family.strip(), path))
+    # 模板源文件目录只在明确要求时使用：普通生成不受 brutal-src/ 中旧文件的影响
+    source_dir = args.source or os.path.join(args.site, SOURCE_DIR_NAME)
+    if args.watch and args.format != "dir":
+        print("❌ --watch 只支持 --format dir", file=sys.stderr)
+        return 2
+    if (args.watch or args.source) and not args.eject and not os.path.isdir(source_dir):
+        print(f"❌ 模板源文件目录 {source_dir} 不存在，先用 --eject 导出内置模板", file=sys.stderr)
+        return 2
+    config = ThemeConfig(
+        name=args.name,
+        inline_icons=inline_icons,
+        site=args.site,
+        fonts=tuple(fonts),
+        font_shard_size=args.font_shard_size,
+        image_formats=tuple(f for f in args.image_formats.split(",") if f),
+        cache_dir=os.path.join(args.site, CACHE_DIR_NAME),
+        source_dir=source_dir if args.watch or args.source else None,
+        instant_nav=args.instant_nav,
+        precache_posts=args.precache_posts,
+    )
+    if args.eject:
+        # 用与生成时相同的完整配置导出
+        written = eject_templates(config, source_dir)
+        if not args.quiet:
+            print(f"📤 Ejected {len(written)} templates to {source_dir}，编辑后用 --watch 增量生成")
+        return 0
+    if config.source_dir:
+        stale = stale_sources(config)
+        if stale:
+            print(f"⚠️  {source_dir} 中以下模板是按导出时的选项渲染的，当前选项会生成不同的内容，", file=sys.stderr)
+            print("   这些选项对它们不生效；删除后重新 --eject 再合并你的修改:", file=sys.stderr)
+            for path in stale:
+                print(f"   - {path}", file=sys.stderr)
+    stats = {}
+    files = render_theme(config, stats)
+
+    if args.format != "dir":
+        if not args.output:
+            print(f"❌ --format {args.format} 需要 --output", file=sys.stderr)
+            return 2
+        prefix = f"{config.name}/"
+        to_stdout = args.output == "-"
+        out = sys.stdout.buffer if to_stdout else open(args.output, "wb")
+        try:
+            sink = TarSink(out, prefix) if args.format == "tar" else ZipSink(out, prefix)
+            report = emit(files, sink)
+        finally:
+            if not to_stdout:
+                out.close()
+        if not args.quiet and not to_stdout:
+            print(f"📦 Wrote {len(report.added)} files to {args.output}")
+        return 0
+
+    if not confirm_site_root(args.site, args.yes):
+        return 1
+    theme_dir = os.path.join(args.site, "themes", config.name)
+    sink = DirectorySink(theme_dir, verbose=not args.quiet)
+    report = emit(files, sink)
+    if not args.quiet:
+        print(f"\n📊 {report.summary()}")
+    if fonts and not args.quiet:
+        for line in stats["fonts"]:
+            print(f"🔤 {line}")
+    if "precache" in stats and not args.quiet:
+        print(f"⚡ Service worker precaches {len(stats['precache'])} URLs (+ core CSS/JS)")
+    if args.css_report:
+        for line in css_report(files, args.site):
+            print(f"🎨 {line}")
+    if args.highlight_report:
+        try:
+            lines = highlight_report(args.site, config.name, args.hugo)
+        except (OSError, RuntimeError) as exc:
+            print(f"❌ {exc}", file=sys.stderr)
+            return 1
+        for line in lines:
+            print(f"🖍️  {line}")
+    if args.watch:
+        sink.verbose = False
+        print(f"👀 Watching {source_dir} (Ctrl+C 退出)")
+        try:
+            ThemeWatcher(config, sink).run()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if not args.quiet:
+        print_next_steps(config.name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""brutal_search.py 的分词/分片必须与主题 search.js 完全一致，否则查询会去错误的分片里找词项。"""
+import json
+import shutil
+import subprocess
+
+import pytest
+
+import brutal_search
+import brutal_theme_installer as installer
+
+SAMPLES = [
+    "Hello，世界！Go语言 中文分词",
+    "ＡＢＣ１２３ ｆｕｌｌ－ｗｉｄｔｈ ｶﾀｶﾅ",
+    "Hugo 主题 v0.145 的 CSS/JS 优化 (2024年)",
+    "한국어 검색 テスト 東京タワー 㐀",
+    "snake_case kebab-case CamelCase 单 字",
+    "",
+]
+BUCKETS = (1, 2, 16, 4096)
+
+
+def _js_functions():
+    """从生成的 search.js 中取出 WORD、ascii、shardOf、tokenize 的定义。"""
+    js = installer.search_js(installer.ThemeConfig())
+    word = next(line for line in js.splitlines() if line.strip().startswith("var WORD ="))
+    start = js.index("  function ascii(")
+    end = js.index("  function postings(")
+    return word + "\n" + js[start:end]
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="需要 node")
+def test_tokenize_and_shard_match_search_js():
+    script = _js_functions() + """
+var samples = JSON.parse(require("fs").readFileSync(0, "utf8"));
+process.stdout.write(JSON.stringify(samples.map(function (text) {
+  var terms = tokenize(text);
+  return [terms, %s.map(function (b) { return terms.map(function (t) { return Number(shardOf(t, b)); }); })];
+})));
+""" % json.dumps(BUCKETS)
+    result = subprocess.run(
+        ["node", "-e", script], input=json.dumps(SAMPLES), capture_output=True, text=True, check=True,
+    )
+    expected = [
+        [brutal_search.tokenize(text), [[brutal_search.shard_of(t, b) for t in brutal_search.tokenize(text)] for b in BUCKETS]]
+        for text in SAMPLES
+    ]
+    assert json.loads(result.stdout) == expected
+    # 样例要真正覆盖全角转换、CJK 二元组和单字
+    terms = set(brutal_search.tokenize(" ".join(SAMPLES)))
+    assert {"abc123", "世界", "语言", "カタ", "单", "v0", "145"} <= terms
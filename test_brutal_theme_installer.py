@@ -0,0 +1,67 @@
+"""DirectorySink 的增量写入：清单快速跳过、清理过期文件、整批原子替换。"""
+import os
+
+import pytest
+
+from brutal_theme_installer import DirectorySink
+
+FILES = {
+    "layouts/_default/baseof.html": b"<html>{{ block \"main\" . }}{{ end }}</html>\n",
+    "layouts/partials/head.html": b"<title>{{ .Title }}</title>\n",
+    "assets/css/main.css": b"body { margin: 0; }\n",
+}
+
+
+def _read(root, key):
+    with open(os.path.join(root, *key.split("/")), "rb") as f:
+        return f.read()
+
+
+def _mtimes(root):
+    return {key: os.stat(os.path.join(root, *key.split("/"))).st_mtime_ns for key in FILES}
+
+
+def test_second_write_skips_unchanged_files(tmp_path):
+    sink = DirectorySink(str(tmp_path), fsync=False)
+    first = sink.write(FILES)
+    assert sorted(first.added) == sorted(FILES)
+    before = _mtimes(str(tmp_path))
+
+    second = sink.write(FILES)
+    assert sorted(second.skipped) == sorted(FILES)
+    assert not (second.added or second.changed or second.removed)
+    assert _mtimes(str(tmp_path)) == before
+
+
+def test_dropped_file_is_removed(tmp_path):
+    sink = DirectorySink(str(tmp_path), fsync=False)
+    sink.write(FILES)
+    files = dict(FILES)
+    del files["layouts/partials/head.html"]
+
+    report = sink.write(files)
+    assert report.removed == ["layouts/partials/head.html"]
+    assert not os.path.exists(tmp_path / "layouts" / "partials" / "head.html")
+    # 清单不再记录它，下次运行也不会再报告
+    assert sink.write(files).removed == []
+
+
+def test_failed_staging_replaces_nothing(tmp_path, monkeypatch):
+    sink = DirectorySink(str(tmp_path), fsync=False)
+    sink.write(FILES)
+    updated = {key: data + b"/* v2 */\n" for key, data in FILES.items()}
+    write_temp = DirectorySink._write_temp
+
+    def flaky(self, path, data):
+        if path.endswith("head.html"):
+            raise OSError("disk full")
+        return write_temp(self, path, data)
+
+    monkeypatch.setattr(DirectorySink, "_write_temp", flaky)
+    with pytest.raises(OSError, match="disk full"):
+        sink.write(updated)
+    for key, data in FILES.items():
+        assert _read(str(tmp_path), key) == data
+    # 写好的临时文件也要清理掉
+    leftovers = [name for _, _, names in os.walk(tmp_path) for name in names if name.endswith("~")]
+    assert leftovers == []